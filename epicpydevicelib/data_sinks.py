@@ -0,0 +1,770 @@
+"""
+Data sinks are the objects EpicPyDevice hands back as self.data_writer. They accept
+trial data one row at a time via writerow(...) (just like a csv.writer) but queue the
+rows in memory and write them to disk in bulk once a row or byte threshold is reached.
+
+Every sink owns its output file, and every sink is flushed and closed by
+EpicPyDevice.finalize_data_output(), so devices never need to manage that themselves.
+
+To plug in a different sink, subclass DataSink and assign the class to
+device.data_sink before init_data_output() is called. E.g., to store trial data in a
+columnar format that loads much faster for post-run analysis:
+
+    self.data_filename = "data_output.parquet"
+    self.data_filepath = Path(self.device_folder, self.data_filename)
+    self.data_sink = ParquetDataSink
+    self.data_column_types = {"Trial": int, "RT": float}  # optional
+"""
+
+import csv
+import os
+import queue
+import shutil
+import threading
+import time
+from abc import ABC, abstractmethod
+from io import StringIO
+from pathlib import Path
+from typing import Callable, Iterable, Optional, Sequence, Union
+
+
+class DataSchemaError(IOError):
+    """A batch of rows doesn't fit the column types of a columnar data file."""
+
+
+class DataSink(ABC):
+    """
+    Base class for device data sinks. Subclasses implement writerow(), flush(),
+    close(), count_rows() and merge_files().
+    writerow() - queue a row of values (same order as the data header)
+    writerows() - queue several rows at once
+    flush() - write any queued rows to disk
+    close() - flush and release the output file
+    row_count() - number of data rows in the file, including any still queued
+    bytes_written - size of the data on disk as of the last flush
+    count_rows() - count the data rows in an existing file of this format
+    merge_files() - concatenate several files of this format into one
+    """
+
+    def __init__(
+        self,
+        filepath: Union[str, Path],
+        mode: str = "a",
+        header: Sequence = (),
+        max_rows: int = 1000,
+        max_bytes: int = 1 << 20,
+        column_types: Optional[dict] = None,
+    ):
+        self.filepath = Path(filepath)
+        self.mode = mode
+        self.header = tuple(header)
+        self.max_rows = max(1, max_rows)
+        self.max_bytes = max(1, max_bytes)
+        self.column_types = dict(column_types) if column_types else {}
+        self.pending_rows = 0
+
+        # running counters so callers never need to re-read the file to size it.
+        # existing_rows stays None until rows left by an earlier session are counted.
+        self.rows_written = 0
+        self.bytes_written = 0
+        self.existing_rows: Optional[int] = 0
+
+    def existing_row_count(self) -> int:
+        if self.existing_rows is None:
+            self.existing_rows = self.count_rows(self.filepath)
+        return self.existing_rows
+
+    def row_count(self) -> int:
+        return self.existing_row_count() + self.rows_written
+
+    @classmethod
+    @abstractmethod
+    def count_rows(cls, filepath: Union[str, Path]) -> int: ...
+
+    @classmethod
+    @abstractmethod
+    def merge_files(
+        cls, filepaths: Iterable[Union[str, Path]], output: Union[str, Path]
+    ): ...
+
+    @abstractmethod
+    def writerow(self, row: Sequence): ...
+
+    def writerows(self, rows: Iterable[Sequence]):
+        for row in rows:
+            self.writerow(row)
+
+    @abstractmethod
+    def flush(self): ...
+
+    @abstractmethod
+    def close(self): ...
+
+
+class CSVDataSink(DataSink):
+    """
+    Queues rows as csv text in memory and appends them to the data file in bulk.
+    Rows are formatted by the same csv.writer used previously, so the file contents
+    are identical to writing each row straight to disk.
+    """
+
+    def __init__(
+        self,
+        filepath: Union[str, Path],
+        mode: str = "a",
+        header: Sequence = (),
+        max_rows: int = 1000,
+        max_bytes: int = 1 << 20,
+        column_types: Optional[dict] = None,
+    ):
+        super(CSVDataSink, self).__init__(
+            filepath, mode, header, max_rows, max_bytes, column_types
+        )
+
+        self.file = open(self.filepath, self.mode)
+        self._buffer = StringIO()
+        self._writer = csv.writer(self._buffer)
+
+        try:
+            self.bytes_written = os.fstat(self.file.fileno()).st_size
+            if self.mode == "w" or self.bytes_written == 0:
+                self._writer.writerow(self.header)
+                self.flush()
+            else:
+                # rows from an earlier session are only counted if somebody asks
+                self._existing_bytes = self.bytes_written
+                self.existing_rows = None
+        except IOError:
+            self.file.close()
+            raise
+
+    def existing_row_count(self) -> int:
+        if self.existing_rows is None:
+            self.existing_rows = self.count_rows(self.filepath, self._existing_bytes)
+        return self.existing_rows
+
+    @classmethod
+    def count_rows(
+        cls, filepath: Union[str, Path], limit: Optional[int] = None, chunk_size=1 << 20
+    ) -> int:
+        """
+        Count the data rows (lines after the header) in the first limit bytes of a csv
+        file, reading it in chunks so memory use stays flat regardless of file size.
+        Like the old splitlines() count, a quoted value containing a newline adds a
+        line.
+        """
+        lines = 0
+        last = b"\n"
+        remaining = limit if limit is not None else -1
+        with open(filepath, "rb") as f:
+            while remaining:
+                chunk = f.read(
+                    chunk_size if remaining < 0 else min(chunk_size, remaining)
+                )
+                if not chunk:
+                    break
+                lines += chunk.count(b"\n")
+                last = chunk[-1:]
+                if remaining > 0:
+                    remaining -= len(chunk)
+        if last != b"\n":
+            lines += 1  # final line has no line terminator
+        return max(lines - 1, 0)
+
+    @classmethod
+    def merge_files(
+        cls, filepaths: Iterable[Union[str, Path]], output: Union[str, Path]
+    ):
+        """
+        Concatenate csv files that share a header into output, keeping the header of
+        the first file only. Files are copied in chunks, not parsed.
+        """
+        header = None
+        with open(output, "wb") as out:
+            for filepath in filepaths:
+                with open(filepath, "rb") as f:
+                    file_header = f.readline()
+                    if header is None:
+                        header = file_header
+                        out.write(header)
+                    elif file_header.rstrip(b"\r\n") != header.rstrip(b"\r\n"):
+                        raise ValueError(
+                            f"Can't merge {filepath}, its header differs from "
+                            f"{header.decode(errors='replace').strip()!r}"
+                        )
+                    shutil.copyfileobj(f, out)
+
+    def writerow(self, row: Sequence):
+        result = self._writer.writerow(row)
+        self.pending_rows += 1
+        self.rows_written += 1
+        if self.pending_rows >= self.max_rows or self._buffer.tell() >= self.max_bytes:
+            self.flush()
+        return result
+
+    def flush(self):
+        if self._buffer.tell():
+            self.file.write(self._buffer.getvalue())
+            self._buffer.seek(0)
+            self._buffer.truncate()
+        self.pending_rows = 0
+        self.file.flush()
+        self.bytes_written = os.fstat(self.file.fileno()).st_size
+
+    def close(self):
+        try:
+            self.flush()
+        finally:
+            self.file.close()
+
+
+class ArrowDataSink(DataSink):
+    """
+    Accumulates rows column-by-column and writes every max_rows rows out as one Arrow
+    record batch. Column names come from the data header; column types come from
+    column_types (python types like int, float, str, bool, or pyarrow DataTypes) and
+    are otherwise inferred from the rows. When a later batch needs a wider type than
+    the one inferred so far (e.g., a float in a column of ints, or any value in a
+    column that has only held None), the column is promoted and the batches already
+    written are rewritten with the new type. Columns that are still undetermined
+    (e.g., all values None) are stored as strings. Values that can't be stored in a
+    column's type (e.g., text in a column of numbers, or 512.5 in a column declared
+    int) raise DataSchemaError, an IOError, and their batch is dropped.
+
+    Columnar files cannot be appended to in place, so the output is written to a
+    temporary file (copying any existing batches first when mode is "a") that replaces
+    the data file on close(). Until then the data file is left as it was, so if the
+    process dies before close() (or finalize_data_output()), every row of the session
+    is lost; use CSVDataSink when rows must survive a crash. In append mode, the data
+    header must match the columns of the existing file, else DataSchemaError.
+
+    This class writes Arrow IPC files, see ParquetDataSink for Parquet output.
+    max_bytes is not used; batch size is controlled by max_rows.
+    """
+
+    def __init__(
+        self,
+        filepath: Union[str, Path],
+        mode: str = "a",
+        header: Sequence = (),
+        max_rows: int = 1000,
+        max_bytes: int = 1 << 20,
+        column_types: Optional[dict] = None,
+    ):
+        super(ArrowDataSink, self).__init__(
+            filepath, mode, header, max_rows, max_bytes, column_types
+        )
+
+        import pyarrow
+
+        self.pa = pyarrow
+        self.temp_filepath = self.filepath.with_name(f".{self.filepath.name}.tmp")
+        self.schema = self._declared_schema()
+        self._columns = [[] for _ in self.header]
+        self._writer = None
+        # inferred columns that have held nothing but None so far
+        self._undetermined = set()
+        self.dropped_rows = 0
+
+        if (
+            self.mode == "a"
+            and self.filepath.is_file()
+            and self.filepath.stat().st_size
+        ):
+            schema = self._file_schema(self.filepath)
+            if self.header and tuple(schema.names) != self.header:
+                raise DataSchemaError(
+                    f"Can't append to {self.filepath}: its columns {schema.names} "
+                    f"don't match the data header {list(self.header)}"
+                )
+            self.schema = schema
+            self._open_writer()
+            try:
+                self.existing_rows = self._copy_batches(self.filepath)
+            except BaseException:
+                self._writer.close()
+                self._writer = None
+                self.temp_filepath.unlink(missing_ok=True)
+                raise
+            self._update_bytes_written()
+
+    def _arrow_type(self, column_type):
+        pa = self.pa
+        python_types = {
+            int: pa.int64(),
+            float: pa.float64(),
+            str: pa.string(),
+            bool: pa.bool_(),
+        }
+        return python_types.get(column_type, column_type)
+
+    def _declared_schema(self):
+        if not self.header or not set(self.header) <= set(self.column_types):
+            return None
+        return self.pa.schema(
+            [(name, self._arrow_type(self.column_types[name])) for name in self.header]
+        )
+
+    @classmethod
+    def count_rows(cls, filepath: Union[str, Path]) -> int:
+        import pyarrow
+
+        with pyarrow.memory_map(str(filepath)) as source:
+            reader = pyarrow.ipc.open_file(source)
+            return sum(
+                reader.get_batch(i).num_rows for i in range(reader.num_record_batches)
+            )
+
+    @classmethod
+    def merge_files(
+        cls, filepaths: Iterable[Union[str, Path]], output: Union[str, Path]
+    ):
+        """
+        Concatenate files of this format into output, one batch at a time. Column types
+        inferred differently in different files (e.g., int and float) are promoted to a
+        common type. filepaths is consumed lazily, one file at a time, so it can be fed
+        files as they are written. When a file needs a wider schema than the files
+        before it, what was already merged is rewritten with the wider schema.
+        """
+        import pyarrow
+
+        output = Path(output)
+        schema = None
+        writer = None
+        try:
+            for filepath in filepaths:
+                file_schema = cls._file_schema(Path(filepath))
+                if schema is None:
+                    schema = file_schema
+                    writer = cls._file_writer(output, schema)
+                else:
+                    wider = pyarrow.unify_schemas(
+                        [schema, file_schema], promote_options="permissive"
+                    )
+                    if not wider.equals(schema):
+                        writer.close()
+                        writer = None
+                        merged = output.with_name(f".{output.name}.merged")
+                        os.replace(output, merged)
+                        try:
+                            schema = wider
+                            writer = cls._file_writer(output, schema)
+                            for table in cls._file_tables(merged):
+                                writer.write_table(table.cast(schema))
+                        finally:
+                            merged.unlink(missing_ok=True)
+                for table in cls._file_tables(Path(filepath)):
+                    writer.write_table(table.select(schema.names).cast(schema))
+        finally:
+            if writer is not None:
+                writer.close()
+
+    @classmethod
+    def _file_schema(cls, path: Path):
+        import pyarrow
+
+        with pyarrow.memory_map(str(path)) as source:
+            return pyarrow.ipc.open_file(source).schema
+
+    @classmethod
+    def _file_tables(cls, path: Path):
+        import pyarrow
+
+        with pyarrow.memory_map(str(path)) as source:
+            reader = pyarrow.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                yield pyarrow.Table.from_batches([reader.get_batch(i)])
+
+    @classmethod
+    def _file_writer(cls, path: Path, schema):
+        import pyarrow
+
+        return pyarrow.ipc.new_file(str(path), schema)
+
+    def _copy_batches(self, path: Path) -> int:
+        rows = 0
+        for table in self._file_tables(path):
+            self._writer.write_table(table.cast(self.schema))
+            rows += table.num_rows
+        return rows
+
+    def _update_bytes_written(self):
+        try:
+            self.bytes_written = self.temp_filepath.stat().st_size
+        except OSError:
+            pass
+
+    def _write_batch(self, batch):
+        self._writer.write_batch(batch)
+
+    def _open_writer(self):
+        self._writer = self._file_writer(self.temp_filepath, self.schema)
+
+    def _column_array(self, column: list, name: str, current_type=None):
+        """
+        Convert one column of a batch to an array. Declared columns get their declared
+        type; other columns get current_type, or a type both it and the values fit.
+        """
+        pa = self.pa
+        declared = self.column_types.get(name)
+        try:
+            if declared is not None:
+                declared = self._arrow_type(declared)
+                try:
+                    inferred = pa.array(column)
+                except (pa.ArrowInvalid, pa.ArrowTypeError):
+                    return pa.array(column, type=declared)
+                # (a safe cast, unlike pa.array(..., type=), refuses to truncate)
+                return inferred.cast(declared)
+
+            array = pa.array(column)
+            if pa.types.is_null(array.type):
+                if current_type is None or name in self._undetermined:
+                    self._undetermined.add(name)
+                    return array.cast(pa.string())
+                return array.cast(current_type)
+            if current_type is None or name in self._undetermined:
+                self._undetermined.discard(name)
+                return array
+            if array.type != current_type:
+                wider = (
+                    pa.unify_schemas(
+                        [
+                            pa.schema([(name, current_type)]),
+                            pa.schema([(name, array.type)]),
+                        ],
+                        promote_options="permissive",
+                    )
+                    .field(0)
+                    .type
+                )
+                array = array.cast(wider)
+            return array
+        except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+            raise DataSchemaError(
+                f"Data column {name!r} of {self.filepath} can't hold these values: {e}"
+            ) from e
+
+    def _build_batch(self):
+        pa = self.pa
+        if self.schema is None:
+            arrays = [
+                self._column_array(column, name)
+                for column, name in zip(self._columns, self.header)
+            ]
+            batch = pa.record_batch(arrays, names=list(self.header))
+            self.schema = batch.schema
+            return batch
+
+        arrays = [
+            self._column_array(column, field.name, field.type)
+            for column, field in zip(self._columns, self.schema)
+        ]
+        schema = pa.schema(
+            [(field.name, array.type) for field, array in zip(self.schema, arrays)]
+        )
+        if not schema.equals(self.schema):
+            self._promote_schema(schema)
+        return pa.record_batch(arrays, schema=self.schema)
+
+    def _promote_schema(self, schema):
+        """Switch to a wider schema, rewriting any batches written so far."""
+        self.schema = schema
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+        old_filepath = self.temp_filepath.with_name(f"{self.temp_filepath.name}.old")
+        os.replace(self.temp_filepath, old_filepath)
+        try:
+            self._open_writer()
+            self._copy_batches(old_filepath)
+        finally:
+            old_filepath.unlink(missing_ok=True)
+
+    def writerow(self, row: Sequence):
+        if len(row) != len(self._columns):
+            raise ValueError(
+                f"Data row has {len(row)} values but data header has "
+                f"{len(self._columns)} columns: {row}"
+            )
+        for column, value in zip(self._columns, row):
+            column.append(value)
+        self.pending_rows += 1
+        self.rows_written += 1
+        if self.pending_rows >= self.max_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.pending_rows:
+            return
+        try:
+            batch = self._build_batch()
+        except DataSchemaError:
+            # drop the batch, or every later flush would fail on it again
+            self.dropped_rows += self.pending_rows
+            self._columns = [[] for _ in self.header]
+            self.pending_rows = 0
+            raise
+        if self._writer is None:
+            self._open_writer()
+        self._write_batch(batch)
+        self._columns = [[] for _ in self.header]
+        self.pending_rows = 0
+        self._update_bytes_written()
+
+    def close(self):
+        try:
+            self.flush()
+            if self._writer is None:
+                # nothing written this session, still leave a valid (empty) file behind
+                if self.mode == "a" and self.filepath.is_file():
+                    if self.filepath.stat().st_size:
+                        return
+                if self.schema is None:
+                    self.schema = self.pa.schema(
+                        [(name, self.pa.string()) for name in self.header]
+                    )
+                self._open_writer()
+            self._writer.close()
+            self._writer = None
+            os.replace(self.temp_filepath, self.filepath)
+            self.bytes_written = self.filepath.stat().st_size
+        finally:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self.temp_filepath.unlink(missing_ok=True)
+
+
+class ParquetDataSink(ArrowDataSink):
+    """
+    Same as ArrowDataSink, but each batch of max_rows rows is written to a Parquet
+    file as one row group.
+    """
+
+    def __init__(
+        self,
+        filepath: Union[str, Path],
+        mode: str = "a",
+        header: Sequence = (),
+        max_rows: int = 1000,
+        max_bytes: int = 1 << 20,
+        column_types: Optional[dict] = None,
+    ):
+        import pyarrow.parquet
+
+        self.pq = pyarrow.parquet
+        super(ParquetDataSink, self).__init__(
+            filepath, mode, header, max_rows, max_bytes, column_types
+        )
+
+    @classmethod
+    def count_rows(cls, filepath: Union[str, Path]) -> int:
+        import pyarrow.parquet
+
+        return pyarrow.parquet.read_metadata(str(filepath)).num_rows
+
+    @classmethod
+    def _file_schema(cls, path: Path):
+        import pyarrow.parquet
+
+        return pyarrow.parquet.read_schema(str(path))
+
+    @classmethod
+    def _file_tables(cls, path: Path):
+        import pyarrow.parquet
+
+        parquet_file = pyarrow.parquet.ParquetFile(str(path))
+        for i in range(parquet_file.num_row_groups):
+            yield parquet_file.read_row_group(i)
+
+    @classmethod
+    def _file_writer(cls, path: Path, schema):
+        import pyarrow.parquet
+
+        return pyarrow.parquet.ParquetWriter(str(path), schema)
+
+
+class ThreadedDataSink:
+    """
+    Wraps another data sink and hands its rows to a dedicated writer thread, so disk
+    stalls (network filesystems, fsync, etc.) don't hold up the simulation thread.
+
+    Rows wait in a queue bounded by max_queue; when the queue is full, writerow()
+    blocks until the writer thread catches up (back-pressure). flush() and close()
+    block until everything queued so far has been handed to the wrapped sink.
+
+    The first error raised on the writer thread is passed to on_error() on the
+    caller's thread during the next writerow(), flush(), or close() call (or raised
+    there if on_error is None). Later errors are only counted (so a full disk doesn't
+    produce one report per row) and summed up in a single report by close().
+
+    metrics() reports the current and maximum queue depth, how often writerow() had
+    to wait for room in the queue, the latency of the wrapped sink's flushes, and
+    the number of errors.
+    """
+
+    _FLUSH = object()
+    _CLOSE = object()
+
+    def __init__(
+        self,
+        sink: DataSink,
+        max_queue: int = 10000,
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        self.sink = sink
+        self.filepath = sink.filepath
+        self.header = sink.header
+        self.on_error = on_error
+
+        self.rows_written = 0
+        self.blocked_writes = 0
+        self.max_queue_depth = 0
+        self.flush_count = 0
+        self.flush_seconds = 0.0
+        self.last_flush_seconds = 0.0
+        self.max_flush_seconds = 0.0
+
+        self.errors = 0
+        self.reported_errors = 0
+        self._first_error: Optional[Exception] = None
+
+        self._queue = queue.Queue(maxsize=max(1, max_queue))
+        self._closed = False
+
+        self._thread = threading.Thread(
+            target=self._run, name=f"DataSink({self.filepath.name})", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def bytes_written(self) -> int:
+        return self.sink.bytes_written
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def row_count(self) -> int:
+        return self.sink.existing_row_count() + self.rows_written
+
+    def metrics(self) -> dict:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "blocked_writes": self.blocked_writes,
+            "flush_count": self.flush_count,
+            "mean_flush_seconds": (
+                self.flush_seconds / self.flush_count if self.flush_count else 0.0
+            ),
+            "last_flush_seconds": self.last_flush_seconds,
+            "max_flush_seconds": self.max_flush_seconds,
+            "errors": self.errors,
+        }
+
+    def _record_flush(self, elapsed: float):
+        self.flush_count += 1
+        self.flush_seconds += elapsed
+        self.last_flush_seconds = elapsed
+        self.max_flush_seconds = max(self.max_flush_seconds, elapsed)
+
+    def _write(self, item):
+        sink = self.sink
+        if item is self._CLOSE:
+            sink.close()
+            return
+        had_pending = sink.pending_rows > 0
+        start = time.perf_counter()
+        try:
+            if item is self._FLUSH:
+                sink.flush()
+            else:
+                sink.writerow(item)
+        finally:
+            # also time the flushes the sink does on its own inside writerow(), when
+            # its row/byte thresholds are reached (its queue is then left empty)
+            if sink.pending_rows == 0 and (had_pending or item is not self._FLUSH):
+                self._record_flush(time.perf_counter() - start)
+
+    def _run(self):
+        item = None
+        while item is not self._CLOSE:
+            item = self._queue.get()
+            try:
+                self._write(item)
+            except Exception as e:
+                if self._first_error is None:
+                    self._first_error = e
+                self.errors += 1
+            finally:
+                self._queue.task_done()
+
+    def _report_errors(self):
+        e = self._first_error
+        if e is None or self.reported_errors:
+            return
+        self.reported_errors = 1
+        if self.on_error is None:
+            raise e
+        self.on_error(e)
+
+    def _report_error_count(self):
+        # called once the writer thread is done, so the count is final
+        unreported = self.errors - self.reported_errors
+        if not unreported:
+            return
+        self.reported_errors = self.errors
+        e = IOError(f"{unreported} more errors writing to {self.filepath}")
+        if self.on_error is None:
+            raise e
+        self.on_error(e)
+
+    def _put(self, item):
+        if self._closed:
+            raise ValueError(f"Data sink for {self.filepath} is closed.")
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.blocked_writes += 1
+            self._queue.put(item)
+        depth = self._queue.qsize()
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+
+    def writerow(self, row: Sequence):
+        if self._first_error is not None and not self.reported_errors:
+            self._report_errors()
+        # copy now, devices often reuse and mutate the same row list
+        self._put(tuple(row))
+        self.rows_written += 1
+
+    def writerows(self, rows: Iterable[Sequence]):
+        for row in rows:
+            self.writerow(row)
+
+    def flush(self):
+        self._put(self._FLUSH)
+        self._queue.join()
+        self._report_errors()
+
+    def close(self):
+        if self._closed:
+            return
+        self._put(self._CLOSE)
+        self._closed = True
+        self._thread.join()
+        self._report_errors()
+        self._report_error_count()
+
+
+if __name__ == "__main__":
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sink = CSVDataSink(Path(tmp, "data.csv"), "w", ("Trial", "RT"), max_rows=3)
+        for trial in range(10):
+            sink.writerow((trial + 1, 500 + trial))
+        sink.close()
+        print(Path(tmp, "data.csv").read_text())
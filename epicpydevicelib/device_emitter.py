@@ -1,6 +1,461 @@
+"""
+bus carries device output (e.g., "stats_write", "background_image") to whatever is
+listening, typically the EPICpy gui. Listeners run on the emitting thread, i.e., the
+simulation thread, so a slow listener slows the simulation down.
+
+bus is an InstrumentedEventEmitter, which keeps, per event name, the number of emits,
+the time spent in each listener (total, maximum, and a histogram), and warns (through
+Device_out) when a listener takes longer than slow_listener_seconds. Use
+bus.metrics() to look at these at runtime, and bus.dump_metrics() to print or save
+them, e.g., once a run is done.
+
+To keep listeners off the simulation thread altogether, call bus.start_dispatcher().
+From then on emit() only queues the event (in a bounded queue) and returns; a
+dispatcher thread calls the listeners, in the order the events were emitted. What
+happens to an event when the queue is full depends on its policy (see
+set_event_policy()):
+    "block" - (default) wait for room in the queue
+    "drop" - discard the event
+    "coalesce" - if an emit of the same name is still waiting, replace its arguments
+                 with the new ones, so listeners only see the latest (for events that
+                 report a state, e.g., progress or a background image). Coalescing
+                 happens whether or not the queue is full. The replaced emit keeps
+                 its place in the queue, so the latest arguments can be delivered
+                 ahead of events of other names emitted after the first one.
+Events of the same name are always delivered in the order they were emitted.
+bus.flush() waits until every queued event has been delivered, stop_dispatcher()
+does the same and then returns the bus to calling listeners inline. If given a
+timeout that runs out first, stop_dispatcher() returns False and the dispatcher
+thread goes on until the queue is empty, and returns the bus to inline delivery then.
+Until that happens, emits keep going to the queue (behind the ones already waiting),
+so events are never delivered inline while the dispatcher is still delivering.
+"""
+
+import json
+import queue
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
 from pyee import EventEmitter
 
-bus = EventEmitter()
+# histogram bucket i counts listener calls taking less than 2**i microseconds
+_N_BUCKETS = 24
+
+
+def _listener_name(f: Callable) -> str:
+    name = getattr(f, "__qualname__", None) or repr(f)
+    module = getattr(f, "__module__", None)
+    return f"{module}.{name}" if module else name
+
+
+class EventMetrics:
+    __slots__ = (
+        "emits",
+        "unhandled",
+        "listener_calls",
+        "total_seconds",
+        "max_seconds",
+        "slow_calls",
+        "histogram",
+        "listeners",
+        "queued",
+        "dropped",
+        "coalesced",
+    )
+
+    def __init__(self):
+        self.emits = 0
+        self.unhandled = 0
+        self.listener_calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.slow_calls = 0
+        self.histogram = [0] * _N_BUCKETS
+        # listener name -> [calls, total seconds, max seconds, slow calls]
+        self.listeners: Dict[str, List[Union[int, float]]] = dict()
+        # dispatcher mode only
+        self.queued = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def record(self, listener: str, seconds: float, slow: bool) -> int:
+        """Add one listener call, returns that listener's number of slow calls."""
+        self.listener_calls += 1
+        self.total_seconds += seconds
+        if seconds > self.max_seconds:
+            self.max_seconds = seconds
+        bucket = min(int(seconds * 1e6).bit_length(), _N_BUCKETS - 1)
+        self.histogram[bucket] += 1
+
+        stats = self.listeners.get(listener)
+        if stats is None:
+            stats = self.listeners[listener] = [0, 0.0, 0.0, 0]
+        stats[0] += 1
+        stats[1] += seconds
+        if seconds > stats[2]:
+            stats[2] = seconds
+        if slow:
+            self.slow_calls += 1
+            stats[3] += 1
+        return stats[3]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "emits": self.emits,
+            "unhandled": self.unhandled,
+            "listener_calls": self.listener_calls,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": (
+                self.total_seconds / self.listener_calls if self.listener_calls else 0.0
+            ),
+            "max_seconds": self.max_seconds,
+            "slow_calls": self.slow_calls,
+            "queued": self.queued,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            # upper bound of each non-empty bucket (in microseconds) -> calls
+            "histogram_us": {
+                2**i: count for i, count in enumerate(self.histogram) if count
+            },
+            "listeners": {
+                name: {
+                    "calls": calls,
+                    "total_seconds": total,
+                    "max_seconds": maximum,
+                    "slow_calls": slow,
+                }
+                for name, (calls, total, maximum, slow) in self.listeners.items()
+            },
+        }
+
+
+class InstrumentedEventEmitter(EventEmitter):
+    """
+    A pyee EventEmitter that records per-event emit counts and listener timings.
+    instrumented - set to False to skip the timing altogether
+    slow_listener_seconds - listener calls taking longer than this are counted as slow
+                            and reported (on the 1st, 10th, 100th, ... slow call)
+    metrics() - {event name: dict of counts and timings}
+    reset_metrics() - forget everything recorded so far
+    dump_metrics() - metrics as a readable report, optionally saved to a file (as
+                     json if its name ends in .json)
+    start_dispatcher() - deliver events from a dispatcher thread from now on
+    set_event_policy() - "block", "drop" or "coalesce", see module docstring
+    flush() - wait until all queued events have been delivered
+    stop_dispatcher() - flush, then go back to delivering events inline; returns False
+                        if its timeout ran out first
+    """
+
+    _POLICIES = ("block", "drop", "coalesce")
+    # pyee's own events, delivered inline even in dispatcher mode
+    _INLINE_EVENTS = ("new_listener", "error")
+    # wakes the dispatcher thread up to look at _stopping
+    _STOP = object()
+
+    def __init__(self, slow_listener_seconds: float = 0.05):
+        super(InstrumentedEventEmitter, self).__init__()
+        self.instrumented = True
+        self.slow_listener_seconds = slow_listener_seconds
+        self.warn: Optional[Callable[[str], Any]] = None
+        self._metrics: Dict[str, EventMetrics] = OrderedDict()
+        # metrics are updated by emitting threads and the dispatcher thread
+        self._metrics_lock = threading.Lock()
+
+        self.policies: Dict[str, str] = dict()
+        self.max_queue_depth = 0
+        self._queue: Optional[queue.Queue] = None
+        self._dispatcher: Optional[threading.Thread] = None
+        self._stopping = False
+        # held while deciding whether an emit is queued or delivered inline, and while
+        # switching between the two
+        self._dispatch_lock = threading.Lock()
+        # event name -> [args, kwargs] of the queued, not yet delivered, coalesced emit
+        self._coalesced: Dict[str, list] = dict()
+        self._coalesce_lock = threading.Lock()
+        # listener -> _listener_name(listener), for the listeners registered now
+        self._listener_names: Dict[Callable, str] = dict()
+
+    def _add_event_handler(self, event: str, k: Callable, v: Callable):
+        self._listener_names[k] = _listener_name(k)
+        super(InstrumentedEventEmitter, self)._add_event_handler(event, k, v)
+
+    def _remove_listener(self, event: str, f: Callable):
+        super(InstrumentedEventEmitter, self)._remove_listener(event, f)
+        if not any(f in listeners for listeners in self._events.values()):
+            self._listener_names.pop(f, None)
+
+    def remove_all_listeners(self, event: Optional[str] = None):
+        super(InstrumentedEventEmitter, self).remove_all_listeners(event)
+        with self._lock:
+            registered = {f for listeners in self._events.values() for f in listeners}
+            self._listener_names = {
+                f: name for f, name in self._listener_names.items() if f in registered
+            }
+
+    def _event_metrics(self, event: str) -> EventMetrics:
+        # (call with _metrics_lock held)
+        metrics = self._metrics.get(event)
+        if metrics is None:
+            metrics = self._metrics[event] = EventMetrics()
+        return metrics
+
+    def set_event_policy(self, event: str, policy: str):
+        if policy not in self._POLICIES:
+            raise ValueError(f"policy must be one of {self._POLICIES}, not {policy!r}")
+        self.policies[event] = policy
+
+    @property
+    def dispatching(self) -> bool:
+        return self._dispatcher is not None
+
+    def start_dispatcher(self, max_queue: int = 1000):
+        with self._dispatch_lock:
+            if self._dispatcher is not None:
+                # (still running, maybe on its way to stopping: keep it)
+                self._stopping = False
+                return
+            self._stopping = False
+            self._queue = queue.Queue(maxsize=max(1, max_queue))
+            self._dispatcher = threading.Thread(
+                target=self._dispatch_loop,
+                args=(self._queue,),
+                name="event_bus_dispatcher",
+                daemon=True,
+            )
+            self._dispatcher.start()
+
+    def stop_dispatcher(self, timeout: Optional[float] = None) -> bool:
+        with self._dispatch_lock:
+            dispatcher, event_queue = self._dispatcher, self._queue
+            if dispatcher is None:
+                return True
+            self._stopping = True
+        # the dispatcher thread switches the bus back to inline delivery itself, once
+        # it has emptied the queue
+        event_queue.put(self._STOP)
+        dispatcher.join(timeout)
+        if dispatcher.is_alive():
+            self._report(
+                f"WARNING: the bus dispatcher didn't stop within {timeout} s, "
+                f"{event_queue.qsize()} events are still queued\n"
+            )
+            return False
+        return True
+
+    def flush(self):
+        event_queue = self._queue
+        if event_queue is not None:
+            event_queue.join()
+
+    def emit(self, event: str, *args: Any, **kwargs: Any) -> bool:
+        if event not in self._INLINE_EVENTS and self._queue is not None:
+            while True:
+                with self._dispatch_lock:
+                    event_queue = self._queue
+                    if event_queue is None:
+                        break  # stopped meanwhile, deliver inline
+                    queued = self._enqueue(event_queue, event, args, kwargs)
+                    if queued is not None:
+                        return queued
+                # the queue is full and the policy is "block": wait for room without
+                # holding the lock (a listener may be emitting, too)
+                # (as Queue.put() does; full() would take the mutex held here)
+                with event_queue.not_full:
+                    while event_queue._qsize() >= event_queue.maxsize:
+                        event_queue.not_full.wait(0.1)
+        return super(InstrumentedEventEmitter, self).emit(event, *args, **kwargs)
+
+    def _enqueue(
+        self,
+        event_queue: queue.Queue,
+        event: str,
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+    ) -> Optional[bool]:
+        """
+        Queue (or coalesce) an emit, returns whether it was, or None if the queue is
+        full and it should be tried again. Called with _dispatch_lock held, so the
+        dispatcher can't stop meanwhile.
+        """
+        policy = self.policies.get(event, "block")
+        try:
+            if policy == "coalesce":
+                with self._coalesce_lock:
+                    pending = self._coalesced.get(event)
+                    if pending is not None:
+                        pending[0], pending[1] = args, kwargs
+                        with self._metrics_lock:
+                            self._event_metrics(event).coalesced += 1
+                        return True
+                    # the dispatcher looks the arguments up when it gets to this entry
+                    event_queue.put_nowait((event, None, None))
+                    self._coalesced[event] = [args, kwargs]
+            else:
+                event_queue.put_nowait((event, args, kwargs))
+        except queue.Full:
+            if policy != "drop":
+                return None
+            with self._metrics_lock:
+                self._event_metrics(event).dropped += 1
+            return False
+
+        depth = event_queue.qsize()
+        with self._metrics_lock:
+            self._event_metrics(event).queued += 1
+            if depth > self.max_queue_depth:
+                self.max_queue_depth = depth
+        return True
+
+    def _dispatch_loop(self, event_queue: queue.Queue):
+        while True:
+            item = event_queue.get()
+            try:
+                if item is not self._STOP:
+                    self._dispatch(*item)
+            finally:
+                event_queue.task_done()
+            if self._stopping and event_queue.empty():
+                with self._dispatch_lock:
+                    # (emits can't queue anything more while the lock is held)
+                    if self._stopping and event_queue.empty():
+                        self._dispatcher = None
+                        self._queue = None
+                        self._stopping = False
+                        return
+
+    def _dispatch(
+        self,
+        event: str,
+        args: Optional[Tuple[Any, ...]],
+        kwargs: Optional[Dict[str, Any]],
+    ):
+        if args is None:
+            with self._coalesce_lock:
+                args, kwargs = self._coalesced.pop(event)
+        try:
+            self._call_handlers(event, args, kwargs)
+        except Exception as e:
+            # nobody is waiting on the emit anymore, so pass the error on
+            if self._events.get("error"):
+                super(InstrumentedEventEmitter, self).emit("error", e)
+            else:
+                self._report(
+                    f"ERROR: bus listener for {event!r} raised "
+                    f"{type(e).__name__}: {e}\n"
+                )
+
+    def _call_handlers(
+        self, event: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]
+    ) -> bool:
+        if not self.instrumented:
+            return super(InstrumentedEventEmitter, self)._call_handlers(
+                event, args, kwargs
+            )
+
+        with self._lock:
+            handlers = list(self._events.get(event, OrderedDict()).items())
+        with self._metrics_lock:
+            metrics = self._event_metrics(event)
+            metrics.emits += 1
+            if not handlers:
+                metrics.unhandled += 1
+        if not handlers:
+            return False
+
+        names = self._listener_names
+        clock = time.perf_counter
+        # (k is the listener as registered, f what is called, which differ for once())
+        for k, f in handlers:
+            start = clock()
+            try:
+                self._emit_run(f, args, kwargs)
+            finally:
+                seconds = clock() - start
+                slow = seconds > self.slow_listener_seconds
+                name = names.get(k) or _listener_name(k)
+                with self._metrics_lock:
+                    slow_calls = metrics.record(name, seconds, slow)
+                if slow and str(slow_calls).rstrip("0") == "1":
+                    self._warn_slow(event, name, seconds, slow_calls)
+        return True
+
+    def _warn_slow(self, event: str, name: str, seconds: float, slow_calls: int):
+        message = (
+            f"WARNING: bus listener {name} took {seconds * 1000:.1f} ms "
+            f"to handle {event!r} ({slow_calls} slow call"
+            f"{'s' if slow_calls > 1 else ''} so far)\n"
+        )
+        self._report(message)
+
+    def _report(self, message: str):
+        warn = self.warn
+        if warn is None:
+            from epiclibcpp.epiclib.output_tee_globals import Device_out
+
+            warn = Device_out
+        try:
+            warn(message)
+        except Exception:
+            pass
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._metrics_lock:
+            return {
+                event: metrics.as_dict() for event, metrics in self._metrics.items()
+            }
+
+    def reset_metrics(self):
+        with self._metrics_lock:
+            self._metrics = OrderedDict()
+            self.max_queue_depth = 0
+
+    def dump_metrics(self, filepath: Optional[Union[str, Path]] = None) -> str:
+        metrics = self.metrics()
+        if filepath is not None and Path(filepath).suffix == ".json":
+            text = json.dumps(metrics, indent=2)
+        else:
+            lines = ["Event bus metrics:"]
+            if self.max_queue_depth:
+                lines.append(f"  max queue depth: {self.max_queue_depth}")
+            for event, m in metrics.items():
+                lines.append(
+                    f"  {event}: {m['emits']} emits ({m['unhandled']} unhandled), "
+                    f"{m['listener_calls']} listener calls, "
+                    f"{m['total_seconds'] * 1000:.1f} ms total, "
+                    f"{m['mean_seconds'] * 1e6:.1f} us mean, "
+                    f"{m['max_seconds'] * 1000:.2f} ms max, "
+                    f"{m['slow_calls']} slow"
+                )
+                if m["queued"] or m["dropped"] or m["coalesced"]:
+                    lines.append(
+                        f"    {m['queued']} queued, {m['dropped']} dropped, "
+                        f"{m['coalesced']} coalesced"
+                    )
+                if m["histogram_us"]:
+                    lines.append(
+                        "    < us: "
+                        + ", ".join(
+                            f"{bound}: {count}"
+                            for bound, count in m["histogram_us"].items()
+                        )
+                    )
+                for name, listener in m["listeners"].items():
+                    lines.append(
+                        f"    {name}: {listener['calls']} calls, "
+                        f"{listener['total_seconds'] * 1000:.1f} ms total, "
+                        f"{listener['max_seconds'] * 1000:.2f} ms max, "
+                        f"{listener['slow_calls']} slow"
+                    )
+            text = "\n".join(lines) + "\n"
+        if filepath is not None:
+            Path(filepath).write_text(text)
+        return text
+
+
+bus = InstrumentedEventEmitter()
 
 """
 # in your pyside6 gui app, use something like this:
@@ -20,6 +475,29 @@ bus.on("progress", lambda v: qt_events.progress.emit(v))
 """
 
 if __name__ == "__main__":
+    bus.warn = print
+    bus.slow_listener_seconds = 0.01
+
+    @bus.on("progress")
+    def slow_progress_bar(value):
+        time.sleep(0.02 if value % 25 == 0 else 0.0)
+
     bus.emit("info", "starting")
-    bus.emit("progress", 50)
+    for value in range(100):
+        bus.emit("progress", value)
     bus.emit("info", "done")
+    print(bus.dump_metrics())
+
+    # the same emits through the dispatcher thread: the emitting thread no longer
+    # waits for the slow listener, and progress updates it can't keep up with are
+    # coalesced
+    bus.reset_metrics()
+    bus.set_event_policy("progress", "coalesce")
+    bus.start_dispatcher(max_queue=100)
+    start = time.perf_counter()
+    for value in range(100):
+        bus.emit("progress", value)
+    emitted = time.perf_counter() - start
+    bus.stop_dispatcher()
+    print(f"100 emits took {emitted * 1000:.2f} ms with the dispatcher")
+    print(bus.dump_metrics())
@@ -1,4 +1,9 @@
-from typing import List
+import math
+import sys
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Tuple, Union
+
+import numpy as np
 
 # from epiclibcpp.epiclib import statistics, rms_statistics, geometric_utilities as gu
 
@@ -177,6 +182,886 @@ class Accumulate_rms_error:
     def get_rms(self): ...
 
 
+""" Bulk (NumPy) accumulators """
+
+# Pure-Python counterparts of the accumulators above with the same getters, plus
+# update_many() / update_pairs() to take whole arrays in one call instead of one
+# update() per value across the pybind11 boundary. They keep the same running sums,
+# added in the same order, and use the same formulas as epiclib's versions, so results
+# are identical to updating one value at a time.
+
+
+def _as_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=float).ravel()
+
+
+def _sqrt(x: float) -> float:
+    # NaN for a (rounding-error) negative variance, as in C++
+    return math.sqrt(x) if x >= 0.0 else math.nan
+
+
+def _sequential_sum(start: float, values: np.ndarray) -> float:
+    """start + values[0] + values[1] + ..., added in order like a running total"""
+    if not len(values):
+        return start
+    # (np.sum() adds pairwise, which can differ in the last bits)
+    return float(np.add.accumulate(np.concatenate(([start], values)))[-1])
+
+
+class Bulk_mean_accumulator:
+    """
+    Mean_accumulator that can also be updated with an array of values at once.
+    reset() - zero the internal variables
+    update() - add a new data value, updating current average
+    update_many() - add an array of data values
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.total = 0.0
+        self.total2 = 0.0
+
+    def reset(self):
+        self.__init__()
+
+    def update(self, x: float):
+        self.n += 1
+        self.total += x
+        self.total2 += x * x
+
+    def update_many(self, xs):
+        xs = _as_array(xs)
+        self.n += len(xs)
+        self.total = _sequential_sum(self.total, xs)
+        self.total2 = _sequential_sum(self.total2, xs * xs)
+
+    def get_n(self) -> int:
+        return self.n
+
+    def get_total(self) -> int:
+        return int(self.total)
+
+    def get_mean(self) -> float:
+        return self.total / self.n if self.n > 0 else 0.0
+
+    def get_sample_var(self) -> float:
+        if self.n <= 0:
+            return 0.0
+        mean = self.get_mean()
+        return self.total2 / self.n - mean * mean
+
+    def get_sample_sd(self) -> float:
+        return _sqrt(self.get_sample_var())
+
+    def get_est_var(self) -> float:
+        if self.n <= 1:
+            return 0.0
+        return self.get_sample_var() * (self.n / (self.n - 1))
+
+    def get_est_sd(self) -> float:
+        return _sqrt(self.get_est_var())
+
+    def get_sdm(self) -> float:
+        return self.get_est_sd() / math.sqrt(self.n) if self.n > 0 else 0.0
+
+    def get_half_95_ci(self) -> float:
+        return 1.96 * self.get_sdm()
+
+
+class Bulk_proportion_accumulator:
+    """
+    Proportion_accumulator that can also be updated with an array of values at once.
+    reset() - zero the internal variables
+    update() - add a new data value, updating current proportion
+    update_many() - add an array of data values (counted if true)
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.count = 0
+
+    def reset(self):
+        self.__init__()
+
+    def update(self, count_it: bool):
+        self.n += 1
+        if count_it:
+            self.count += 1
+
+    def update_many(self, count_its):
+        count_its = np.asarray(count_its).ravel()
+        self.n += len(count_its)
+        self.count += int(np.count_nonzero(count_its))
+
+    def get_n(self) -> int:
+        return self.n
+
+    def get_count(self) -> int:
+        return self.count
+
+    def get_proportion(self) -> float:
+        return self.count / self.n if self.n > 0 else 0.0
+
+
+class Bulk_distribution_accumulator:
+    """
+    Distribution_accumulator that can also be updated with an array of values at once.
+    Initialize with the number of bins and the size in each bin. As in
+    Distribution_accumulator, values too big or too small are accumulated in the
+    smallest or largest bin.
+    update_many() - add an array of data values
+    """
+
+    def __init__(self, n_bins: int, bin_size: float):
+        self.n_bins = n_bins
+        self.bin_size = bin_size
+        self.bins = np.zeros(n_bins, dtype=np.int64)
+        self.n = 0
+        # initial values and updates of min and max mirror epiclib's
+        self.min = sys.float_info.min
+        self.max = sys.float_info.max
+
+    def reset(self):
+        self.__init__(self.n_bins, self.bin_size)
+
+    def _bin_indices(self, xs: np.ndarray) -> np.ndarray:
+        # like C's (int)(x / bin_size): truncated, and INT_MIN when out of int range
+        q = xs / self.bin_size
+        with np.errstate(invalid="ignore"):
+            in_range = (q > -2147483649.0) & (q < 2147483648.0)
+        index = np.where(in_range, np.trunc(np.where(in_range, q, 0.0)), -2147483648.0)
+        return np.clip(index, 0, self.n_bins - 1).astype(np.intp)
+
+    def update(self, x: float):
+        self.update_many((x,))
+
+    def update_many(self, xs):
+        xs = _as_array(xs)
+        if not len(xs):
+            return
+        self.n += len(xs)
+        self.bins += np.bincount(self._bin_indices(xs), minlength=self.n_bins)
+        with np.errstate(invalid="ignore"):
+            smaller = xs[(xs >= 0.0) & (xs < self.min)]
+            larger = xs[xs > self.max]
+        if len(smaller):
+            self.min = float(smaller[np.argmin(smaller)])
+        if len(larger):
+            self.max = float(larger.max())
+
+    def add_counts(self, other):
+        """add the counts of another distribution accumulator (bulk or epiclib's)"""
+        for _bin in range(min(self.n_bins, other.get_n_bins())):
+            self.bins[_bin] += other.get_bin_count(_bin)
+        self.n += other.get_n()
+
+    def get_n(self) -> int:
+        return self.n
+
+    def get_n_bins(self) -> int:
+        return self.n_bins
+
+    def get_bin_size(self) -> float:
+        return self.bin_size
+
+    def get_min(self) -> float:
+        return self.min
+
+    def get_max(self) -> float:
+        return self.max
+
+    def get_bin_count(self, _bin: int) -> int:
+        return int(self.bins[_bin])
+
+    def get_bin_proportion(self, _bin: int) -> float:
+        return int(self.bins[_bin]) / self.n if self.n > 0 else 0.0
+
+    def get_distribution(self) -> List[float]:
+        return [self.get_bin_proportion(_bin) for _bin in range(self.n_bins)]
+
+
+class Bulk_correl_accumulator:
+    """
+    Correl_accumulator that can also be updated with arrays of x and y at once.
+    Like Correl_accumulator, this uses the one-pass approach which can be numerically
+    unreliable under some conditions
+    update_pairs() - add arrays of x and y values
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.sumx = 0.0
+        self.sumy = 0.0
+        self.sumxy = 0.0
+        self.sumx2 = 0.0
+        self.sumy2 = 0.0
+
+    def reset(self):
+        self.__init__()
+
+    def update(self, x: float, y: float):
+        self.n += 1
+        self.sumx += x
+        self.sumy += y
+        self.sumxy += x * y
+        self.sumx2 += x * x
+        self.sumy2 += y * y
+
+    def update_pairs(self, xs, ys):
+        xs = _as_array(xs)
+        ys = _as_array(ys)
+        if len(xs) != len(ys):
+            raise ValueError(
+                f"update_pairs(): got {len(xs)} x values but {len(ys)} y values"
+            )
+        self.n += len(xs)
+        self.sumx = _sequential_sum(self.sumx, xs)
+        self.sumy = _sequential_sum(self.sumy, ys)
+        self.sumxy = _sequential_sum(self.sumxy, xs * ys)
+        self.sumx2 = _sequential_sum(self.sumx2, xs * xs)
+        self.sumy2 = _sequential_sum(self.sumy2, ys * ys)
+
+    def get_n(self) -> int:
+        return self.n
+
+    def get_r(self) -> float:
+        x_term = self.n * self.sumx2 - self.sumx * self.sumx
+        y_term = self.n * self.sumy2 - self.sumy * self.sumy
+        if x_term <= 0.0 or y_term <= 0.0:
+            return 0.0
+        numerator = self.n * self.sumxy - self.sumx * self.sumy
+        return numerator / (math.sqrt(x_term) * math.sqrt(y_term))
+
+    def get_rsq(self) -> float:
+        r = self.get_r()
+        return r * r
+
+    def get_slope(self) -> float:
+        denominator = self.n * self.sumx2 - self.sumx * self.sumx
+        if denominator <= 0.0:
+            return 0.0
+        return (self.n * self.sumxy - self.sumx * self.sumy) / denominator
+
+    def get_intercept(self) -> float:
+        if self.n <= 0:
+            return 0.0
+        return (self.sumy - self.get_slope() * self.sumx) / self.n
+
+
+class Bulk_PredObs_accumulator:
+    """
+    PredObs_accumulator that can also be updated with arrays of predicted and observed
+    values at once. Goodness-of-fit is from the regression of observed on predicted
+    values, and the root mean squared error.
+    update_pairs() - add arrays of predicted and observed values
+    """
+
+    def __init__(self):
+        self.regression = Bulk_correl_accumulator()
+        self.total_squared_error = 0.0
+
+    def reset(self):
+        self.__init__()
+
+    def update(self, predicted: float, observed: float):
+        self.regression.update(predicted, observed)
+        error = predicted - observed
+        self.total_squared_error += error * error
+
+    def update_pairs(self, predicted, observed):
+        predicted = _as_array(predicted)
+        observed = _as_array(observed)
+        self.regression.update_pairs(predicted, observed)
+        errors = predicted - observed
+        self.total_squared_error = _sequential_sum(
+            self.total_squared_error, errors * errors
+        )
+
+    def get_n(self) -> int:
+        return self.regression.get_n()
+
+    def get_rsq(self) -> float:
+        return self.regression.get_rsq()
+
+    def get_slope(self) -> float:
+        return self.regression.get_slope()
+
+    def get_intercept(self) -> float:
+        return self.regression.get_intercept()
+
+    def get_rmse(self) -> float:
+        n = self.get_n()
+        return math.sqrt(self.total_squared_error / n) if n > 0 else 0.0
+
+
+""" Mergeable (Welford/Chan) accumulators """
+
+# These keep means and sums of squared deviations instead of raw sums, updated with
+# Welford's method, which stays accurate where the one-pass sums above lose precision
+# (e.g., many values with a large mean and a small spread). Two accumulators are
+# combined with merge() (Chan et al.'s pairwise formulas), so statistics gathered in
+# separate worker processes can be reduced at the end. Only the state from
+# get_state(), a small dict of numbers, needs to be sent back to the parent:
+#
+#     # in each worker
+#     rt_accumulator = Welford_mean_accumulator()
+#     rt_accumulator.update_many(rts)
+#     return rt_accumulator.get_state()
+#
+#     # in the parent
+#     rt_accumulator = merge_accumulators(
+#         Welford_mean_accumulator.from_state(state) for state in worker_states
+#     )
+
+
+class _Mergeable_accumulator(ABC):
+    _fields: Tuple[str, ...] = ()
+
+    def get_state(self) -> dict:
+        """State of this accumulator as a (JSON-serializable) dict"""
+        return {field: getattr(self, field) for field in self._fields}
+
+    @classmethod
+    def from_state(cls, state: dict):
+        """Rebuild an accumulator from the result of get_state()"""
+        accumulator = cls()
+        for field in cls._fields:
+            setattr(accumulator, field, state[field])
+        return accumulator
+
+    @abstractmethod
+    def merge(self, other):
+        """Fold other (an accumulator of the same type) into this one"""
+
+
+def merge_accumulators(accumulators: Iterable[_Mergeable_accumulator]):
+    """Returns a new accumulator with all of accumulators merged into it"""
+    accumulators = iter(accumulators)
+    try:
+        first = next(accumulators)
+    except StopIteration:
+        raise ValueError("merge_accumulators() needs at least one accumulator")
+    merged = type(first).from_state(first.get_state())
+    for accumulator in accumulators:
+        merged.merge(accumulator)
+    return merged
+
+
+class Welford_mean_accumulator(_Mergeable_accumulator):
+    """
+    Numerically stable, mergeable counterpart of Mean_accumulator, with the same
+    getters.
+    update() - add a new data value, updating current average
+    update_many() - add an array of data values
+    merge() - add in the data of another Welford_mean_accumulator
+    """
+
+    _fields = ("n", "mean", "m2")
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0  # sum of squared deviations from the mean
+
+    def reset(self):
+        self.__init__()
+
+    def update(self, x: float):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    def _combine(self, n: int, mean: float, m2: float):
+        if n == 0:
+            return
+        total_n = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total_n
+        self.m2 += m2 + delta * delta * self.n * n / total_n
+        self.n = total_n
+
+    def update_many(self, xs):
+        xs = _as_array(xs)
+        if len(xs):
+            mean = float(xs.mean())
+            self._combine(len(xs), mean, float(np.square(xs - mean).sum()))
+
+    def merge(self, other: "Welford_mean_accumulator"):
+        self._combine(other.n, other.mean, other.m2)
+
+    def get_n(self) -> int:
+        return self.n
+
+    def get_total(self) -> int:
+        return int(self.mean * self.n)
+
+    def get_mean(self) -> float:
+        return self.mean
+
+    def get_sample_var(self) -> float:
+        return self.m2 / self.n if self.n > 0 else 0.0
+
+    def get_sample_sd(self) -> float:
+        return math.sqrt(self.get_sample_var())
+
+    def get_est_var(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    def get_est_sd(self) -> float:
+        return math.sqrt(self.get_est_var())
+
+    def get_sdm(self) -> float:
+        return self.get_est_sd() / math.sqrt(self.n) if self.n > 0 else 0.0
+
+    def get_half_95_ci(self) -> float:
+        return 1.96 * self.get_sdm()
+
+
+class Welford_correl_accumulator(_Mergeable_accumulator):
+    """
+    Numerically stable, mergeable counterpart of Correl_accumulator, with the same
+    getters.
+    update_pairs() - add arrays of x and y values
+    merge() - add in the data of another Welford_correl_accumulator
+    """
+
+    _fields = ("n", "mean_x", "mean_y", "m2_x", "m2_y", "c_xy")
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = 0.0
+        self.mean_y = 0.0
+        self.m2_x = 0.0
+        self.m2_y = 0.0
+        self.c_xy = 0.0  # sum of products of deviations from the means
+
+    def reset(self):
+        self.__init__()
+
+    def update(self, x: float, y: float):
+        self.n += 1
+        delta_x = x - self.mean_x
+        delta_y = y - self.mean_y
+        self.mean_x += delta_x / self.n
+        self.mean_y += delta_y / self.n
+        self.m2_x += delta_x * (x - self.mean_x)
+        self.m2_y += delta_y * (y - self.mean_y)
+        self.c_xy += delta_x * (y - self.mean_y)
+
+    def _combine(self, n, mean_x, mean_y, m2_x, m2_y, c_xy):
+        if n == 0:
+            return
+        total_n = self.n + n
+        delta_x = mean_x - self.mean_x
+        delta_y = mean_y - self.mean_y
+        weight = self.n * n / total_n
+        self.mean_x += delta_x * n / total_n
+        self.mean_y += delta_y * n / total_n
+        self.m2_x += m2_x + delta_x * delta_x * weight
+        self.m2_y += m2_y + delta_y * delta_y * weight
+        self.c_xy += c_xy + delta_x * delta_y * weight
+        self.n = total_n
+
+    def update_pairs(self, xs, ys):
+        xs = _as_array(xs)
+        ys = _as_array(ys)
+        if len(xs) != len(ys):
+            raise ValueError(
+                f"update_pairs(): got {len(xs)} x values but {len(ys)} y values"
+            )
+        if len(xs):
+            mean_x = float(xs.mean())
+            mean_y = float(ys.mean())
+            dx = xs - mean_x
+            dy = ys - mean_y
+            self._combine(
+                len(xs),
+                mean_x,
+                mean_y,
+                float(np.dot(dx, dx)),
+                float(np.dot(dy, dy)),
+                float(np.dot(dx, dy)),
+            )
+
+    def merge(self, other: "Welford_correl_accumulator"):
+        self._combine(*(getattr(other, field) for field in self._fields))
+
+    def get_n(self) -> int:
+        return self.n
+
+    def get_r(self) -> float:
+        if self.m2_x <= 0.0 or self.m2_y <= 0.0:
+            return 0.0
+        return self.c_xy / (math.sqrt(self.m2_x) * math.sqrt(self.m2_y))
+
+    def get_rsq(self) -> float:
+        r = self.get_r()
+        return r * r
+
+    def get_slope(self) -> float:
+        return self.c_xy / self.m2_x if self.m2_x > 0.0 else 0.0
+
+    def get_intercept(self) -> float:
+        return self.mean_y - self.get_slope() * self.mean_x
+
+
+class Welford_PredObs_accumulator(_Mergeable_accumulator):
+    """
+    Numerically stable, mergeable counterpart of PredObs_accumulator, with the same
+    getters.
+    update_pairs() - add arrays of predicted and observed values
+    merge() - add in the data of another Welford_PredObs_accumulator
+    """
+
+    def __init__(self):
+        self.regression = Welford_correl_accumulator()
+        self.squared_error = Welford_mean_accumulator()
+
+    def reset(self):
+        self.__init__()
+
+    def get_state(self) -> dict:
+        return {
+            "regression": self.regression.get_state(),
+            "squared_error": self.squared_error.get_state(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict):
+        accumulator = cls()
+        accumulator.regression = Welford_correl_accumulator.from_state(
+            state["regression"]
+        )
+        accumulator.squared_error = Welford_mean_accumulator.from_state(
+            state["squared_error"]
+        )
+        return accumulator
+
+    def update(self, predicted: float, observed: float):
+        self.regression.update(predicted, observed)
+        error = predicted - observed
+        self.squared_error.update(error * error)
+
+    def update_pairs(self, predicted, observed):
+        predicted = _as_array(predicted)
+        observed = _as_array(observed)
+        self.regression.update_pairs(predicted, observed)
+        self.squared_error.update_many(np.square(predicted - observed))
+
+    def merge(self, other: "Welford_PredObs_accumulator"):
+        self.regression.merge(other.regression)
+        self.squared_error.merge(other.squared_error)
+
+    def get_n(self) -> int:
+        return self.regression.get_n()
+
+    def get_rsq(self) -> float:
+        return self.regression.get_rsq()
+
+    def get_slope(self) -> float:
+        return self.regression.get_slope()
+
+    def get_intercept(self) -> float:
+        return self.regression.get_intercept()
+
+    def get_rmse(self) -> float:
+        return math.sqrt(self.squared_error.get_mean())
+
+
+""" Streaming quantile and histogram sketches """
+
+# Unlike Distribution_accumulator, these need no range chosen up front and use bounded
+# memory however many values they see. Both share the interface of the mergeable
+# accumulators above (update(), update_many(), merge(), get_state(), from_state()),
+# plus get_quantile() / get_median().
+
+_Quantiles = Union[float, np.ndarray]
+
+
+class Quantile_sketch(_Mergeable_accumulator):
+    """
+    Streaming quantile estimates (t-digest style): values are summarized as at most
+    about compression / 2 weighted centroids, kept small near the tails so extreme
+    percentiles stay accurate. Values are buffered and folded in buffer_size at a time.
+    NaN values are ignored.
+    get_quantile() - value at quantile q (0-1; a float or an array), e.g., 0.5 for the
+                     median
+    """
+
+    def __init__(self, compression: float = 500.0, buffer_size: int = 10000):
+        self.compression = compression
+        self.buffer_size = buffer_size
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self.means = np.zeros(0)
+        self.weights = np.zeros(0)
+        self.buffer: List[float] = []
+
+    def reset(self):
+        self.__init__(self.compression, self.buffer_size)
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray):
+        """fold weighted values (and any buffered values) into the centroids"""
+        if self.buffer:
+            means = np.concatenate((means, self.buffer))
+            weights = np.concatenate((weights, np.ones(len(self.buffer))))
+            self.buffer = []
+        means = np.concatenate((self.means, means))
+        weights = np.concatenate((self.weights, weights))
+        if not len(means):
+            return
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+
+        # values whose cumulative weight starts in the same unit interval of the
+        # scale function k(q) = compression / (2 pi) * asin(2q - 1) share a centroid
+        left = (np.cumsum(weights) - weights) / weights.sum()
+        k = np.floor(self.compression / (2.0 * math.pi) * np.arcsin(2.0 * left - 1.0))
+        starts = np.flatnonzero(np.concatenate(([True], k[1:] != k[:-1])))
+        self.weights = np.add.reduceat(weights, starts)
+        self.means = np.add.reduceat(means * weights, starts) / self.weights
+
+    def update(self, x: float):
+        if math.isnan(x):
+            return
+        self.n += 1
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        self.buffer.append(x)
+        if len(self.buffer) >= self.buffer_size:
+            self._compress(np.zeros(0), np.zeros(0))
+
+    def update_many(self, xs):
+        xs = _as_array(xs)
+        xs = xs[~np.isnan(xs)]
+        if not len(xs):
+            return
+        self.n += len(xs)
+        self.min = min(self.min, float(xs.min()))
+        self.max = max(self.max, float(xs.max()))
+        for start in range(0, len(xs), self.buffer_size):
+            chunk = xs[start : start + self.buffer_size]
+            self._compress(chunk, np.ones(len(chunk)))
+
+    def merge(self, other: "Quantile_sketch"):
+        other._compress(np.zeros(0), np.zeros(0))
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress(other.means, other.weights)
+
+    def get_state(self) -> dict:
+        self._compress(np.zeros(0), np.zeros(0))
+        return {
+            "compression": self.compression,
+            "buffer_size": self.buffer_size,
+            "n": self.n,
+            "min": self.min,
+            "max": self.max,
+            "means": self.means.tolist(),
+            "weights": self.weights.tolist(),
+        }
+
+    @classmethod
+    def from_state(cls, state: dict):
+        sketch = cls(state["compression"], state["buffer_size"])
+        sketch.n, sketch.min, sketch.max = state["n"], state["min"], state["max"]
+        sketch.means = np.asarray(state["means"], dtype=float)
+        sketch.weights = np.asarray(state["weights"], dtype=float)
+        return sketch
+
+    def get_n(self) -> int:
+        return self.n
+
+    def get_min(self) -> float:
+        return self.min
+
+    def get_max(self) -> float:
+        return self.max
+
+    def get_n_centroids(self) -> int:
+        self._compress(np.zeros(0), np.zeros(0))
+        return len(self.means)
+
+    def get_quantile(self, q: _Quantiles) -> _Quantiles:
+        self._compress(np.zeros(0), np.zeros(0))
+        if not self.n:
+            return np.full(np.shape(q), math.nan) if np.ndim(q) else math.nan
+        # interpolate between centroid means placed at the middle of their weight,
+        # with the exact min and max at either end
+        centers = np.cumsum(self.weights) - self.weights / 2.0
+        result = np.interp(
+            np.asarray(q, dtype=float) * self.n,
+            np.concatenate(([0.0], centers, [self.n])),
+            np.concatenate(([self.min], self.means, [self.max])),
+        )
+        return result if np.ndim(q) else float(result)
+
+    def get_median(self) -> float:
+        return self.get_quantile(0.5)
+
+
+class Adaptive_histogram(_Mergeable_accumulator):
+    """
+    Histogram that widens its bins as values arrive, instead of clamping values outside
+    a range fixed up front (cf. Distribution_accumulator). Bins are
+    [k * size, (k + 1) * size) with size = bin_size * 2 ** level; whenever the values
+    would need more than max_bins bins, adjacent pairs of bins are combined (level + 1).
+    Histograms with the same bin_size can be merged. Non-finite values are ignored.
+    """
+
+    def __init__(self, bin_size: float = 1.0, max_bins: int = 1000):
+        self.base_bin_size = bin_size
+        self.max_bins = max(max_bins, 2)
+        self.level = 0
+        self.first = 0  # bin index of counts[0]
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.n = 0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def reset(self):
+        self.__init__(self.base_bin_size, self.max_bins)
+
+    def _coarsen(self):
+        """combine adjacent pairs of bins, doubling the bin size"""
+        first = self.first // 2
+        counts = np.concatenate(
+            (np.zeros(self.first - 2 * first, dtype=np.int64), self.counts)
+        )
+        if len(counts) % 2:
+            counts = np.concatenate((counts, np.zeros(1, dtype=np.int64)))
+        self.counts = counts.reshape(-1, 2).sum(axis=1)
+        self.first = first
+        self.level += 1
+
+    def _add_counts(self, first: int, counts: np.ndarray):
+        """add counts for bins first, first + 1, ... at the current level"""
+        if not len(self.counts):
+            self.first, self.counts = first, counts.copy()
+            return
+        low = min(self.first, first)
+        high = max(self.first + len(self.counts), first + len(counts))
+        combined = np.zeros(high - low, dtype=np.int64)
+        combined[self.first - low : self.first - low + len(self.counts)] += self.counts
+        combined[first - low : first - low + len(counts)] += counts
+        self.first, self.counts = low, combined
+
+    def update(self, x: float):
+        self.update_many((x,))
+
+    def update_many(self, xs):
+        xs = _as_array(xs)
+        xs = xs[np.isfinite(xs)]
+        if not len(xs):
+            return
+        low, high = float(xs.min()), float(xs.max())
+        self.n += len(xs)
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+        while True:
+            size = self.get_bin_size()
+            first, last = math.floor(low / size), math.floor(high / size)
+            if len(self.counts):
+                first = min(first, self.first)
+                last = max(last, self.first + len(self.counts) - 1)
+            if last - first < self.max_bins:
+                break
+            self._coarsen()
+        indices = np.floor(xs / size).astype(np.int64)
+        first = int(indices.min())
+        self._add_counts(first, np.bincount(indices - first).astype(np.int64))
+
+    def merge(self, other: "Adaptive_histogram"):
+        if other.base_bin_size != self.base_bin_size:
+            raise ValueError(
+                f"can't merge histograms with bin_size {self.base_bin_size} "
+                f"and {other.base_bin_size}"
+            )
+        if not other.n:
+            return
+        other = Adaptive_histogram.from_state(other.get_state())
+        while self.level < other.level:
+            self._coarsen()
+        while other.level < self.level:
+            other._coarsen()
+        while True:
+            first = min(self.first, other.first) if self.n else other.first
+            last = other.first + len(other.counts) - 1
+            if self.n:
+                last = max(last, self.first + len(self.counts) - 1)
+            if last - first < self.max_bins:
+                break
+            self._coarsen()
+            other._coarsen()
+        self._add_counts(other.first, other.counts)
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def get_state(self) -> dict:
+        return {
+            "bin_size": self.base_bin_size,
+            "max_bins": self.max_bins,
+            "level": self.level,
+            "first": self.first,
+            "counts": self.counts.tolist(),
+            "n": self.n,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_state(cls, state: dict):
+        histogram = cls(state["bin_size"], state["max_bins"])
+        histogram.level, histogram.first = state["level"], state["first"]
+        histogram.counts = np.asarray(state["counts"], dtype=np.int64)
+        histogram.n, histogram.min, histogram.max = (
+            state["n"],
+            state["min"],
+            state["max"],
+        )
+        return histogram
+
+    def get_n(self) -> int:
+        return self.n
+
+    def get_min(self) -> float:
+        return self.min
+
+    def get_max(self) -> float:
+        return self.max
+
+    def get_bin_size(self) -> float:
+        return self.base_bin_size * 2.0**self.level
+
+    def get_n_bins(self) -> int:
+        return len(self.counts)
+
+    def get_bin_edges(self) -> np.ndarray:
+        return (self.first + np.arange(len(self.counts) + 1)) * self.get_bin_size()
+
+    def get_bin_counts(self) -> np.ndarray:
+        return self.counts.copy()
+
+    def get_distribution(self) -> List[float]:
+        return (self.counts / self.n).tolist() if self.n else []
+
+    def get_quantile(self, q: _Quantiles) -> _Quantiles:
+        if not self.n:
+            return np.full(np.shape(q), math.nan) if np.ndim(q) else math.nan
+        # assume values are spread evenly within each bin (and within [min, max])
+        edges = np.clip(self.get_bin_edges(), self.min, self.max)
+        cumulative = np.concatenate(([0], np.cumsum(self.counts)))
+        result = np.interp(np.asarray(q, dtype=float) * self.n, cumulative, edges)
+        return result if np.ndim(q) else float(result)
+
+    def get_median(self) -> float:
+        return self.get_quantile(0.5)
+
+
 if __name__ == "__main__":
     import random
 
@@ -187,3 +1072,25 @@ if __name__ == "__main__":
     print(f"{mean_accumulator.get_n()=}")
     print(f"{mean_accumulator.get_mean()=}")
     print(f"{mean_accumulator.get_est_var()=}")
+
+    bulk_mean_accumulator = Bulk_mean_accumulator()
+    bulk_mean_accumulator.update_many(np.random.default_rng().normal(500, 50, 10000))
+    print(f"{bulk_mean_accumulator.get_n()=}")
+    print(f"{bulk_mean_accumulator.get_mean()=}")
+    print(f"{bulk_mean_accumulator.get_est_var()=}")
+
+    halves = [Welford_mean_accumulator(), Welford_mean_accumulator()]
+    for half in halves:
+        half.update_many(np.random.default_rng().normal(500, 50, 5000))
+    merged_accumulator = merge_accumulators(halves)
+    print(f"{merged_accumulator.get_state()=}")
+    print(f"{merged_accumulator.get_est_var()=}")
+
+    rts = np.random.default_rng().lognormal(6.0, 0.4, 1_000_000)
+    quantile_sketch = Quantile_sketch()
+    quantile_sketch.update_many(rts)
+    adaptive_histogram = Adaptive_histogram(bin_size=1.0, max_bins=500)
+    adaptive_histogram.update_many(rts)
+    print(f"{np.quantile(rts, [0.5, 0.95, 0.99])=}")
+    print(f"{quantile_sketch.get_quantile([0.5, 0.95, 0.99])=}")
+    print(f"{adaptive_histogram.get_quantile([0.5, 0.95, 0.99])=}")
@@ -1,13 +1,23 @@
 import time
 from pathlib import Path
-from io import BytesIO
-import base64
-import csv
+import functools
 import re
-from typing import Union, List
+import math
+from typing import Union, List, Iterator, Tuple
+from collections.abc import Sequence
 import itertools
 
 from epicpydevicelib.device_emitter import bus
+from epicpydevicelib.data_sinks import CSVDataSink, ThreadedDataSink
+from epicpydevicelib.fast_dispatch import fastmethod
+from epicpydevicelib.output_log import device_log
+from epicpydevicelib.stats_channel import (
+    FigureRenderer,
+    StatsChannel,
+    figure_to_png,
+    png_to_html,
+)
+from epicpydevicelib.symbol import symbol_cache
 
 try:
     from ulid2 import generate_ulid_as_base32
@@ -15,36 +25,103 @@ except Exception:
     import uuid
 import pandas
 from matplotlib.figure import Figure
-from multimethod import multimethod
 
 from epiclibcpp.epiclib import Output_tee
 from epiclibcpp.epiclib import Device_base, Symbol, Speech_word
-from epiclibcpp.epiclib.output_tee_globals import Device_out
 import epiclibcpp.epiclib.geometric_utilities as gu
 
 e_boxed_x = "\u274e"
 e_boxed_check = "\u2611"
 
 
+@functools.lru_cache(maxsize=256)
+def _param_segments(
+    pattern: str, delimiter: str, left: str, right: str
+) -> Tuple[Tuple[str, ...], ...]:
+    return tuple(
+        tuple(seg.strip(left + right).split(delimiter))
+        if seg.startswith(left)
+        else (seg,)
+        for seg in re.split(rf"(\{left}.*?\{right})", pattern)
+    )
+
+
+class ParamPermutations(Sequence):
+    """
+    The expansions of a condition string, produced on demand rather than as a list.
+    len() and indexing are computed from the choices of each segment, so neither
+    requires generating the other permutations. Iteration order is that of
+    itertools.product, i.e., the last bracketed segment varies fastest.
+    """
+
+    __slots__ = ("segments", "_len")
+
+    def __init__(self, segments: Tuple[Tuple[str, ...], ...]):
+        self.segments = segments
+        self._len = math.prod(len(choices) for choices in segments)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[str]:
+        return map("".join, itertools.product(*self.segments))
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("permutation index out of range")
+        parts = []
+        for choices in reversed(self.segments):
+            index, i = divmod(index, len(choices))
+            parts.append(choices[i])
+        return "".join(reversed(parts))
+
+    def __eq__(self, other):
+        if isinstance(other, (ParamPermutations, list, tuple)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self):
+        return f"{type(self).__name__}({len(self)} permutations)"
+
+
 def unpack_param_string(
     pattern: str, delimiter: str = "|", left: str = "[", right: str = "]"
-) -> List[str]:
+) -> ParamPermutations:
     """
     Expand the brace-delimited possibilities in a string.
     E.g.: "10 Easy Dash" or "10 [Easy|Hard] Dash" or "10 [Easy|Hard] [Dash|HUD]"
     Based on solution from stackoverflow.com/MarekG Jan 2 22
+    Returns a lazy sequence (see ParamPermutations); use list() on it for a list.
     """
-    seg_choices = (
-        seg.strip(left + right).split(delimiter) if seg.startswith(left) else [seg]
-        for seg in re.split(rf"(\{left}.*?\{right})", pattern)
-    )
+    return ParamPermutations(_param_segments(pattern, delimiter, left, right))
+
+
+def _as_Symbol(value) -> Symbol:
+    """
+    Convert a name or value to a Symbol the same way the set_visual_object_property
+    overloads do, using the shared symbol_cache.
+    """
+    if isinstance(value, Symbol):
+        return value
+    return symbol_cache(value if isinstance(value, str) else str(value))
+
 
-    return ["".join(parts) for parts in itertools.product(*seg_choices)]
+def _as_Point(value) -> gu.Point:
+    return value if isinstance(value, gu.Point) else gu.Point(*value)
+
+
+def _as_Size(value) -> gu.Size:
+    return value if isinstance(value, gu.Size) else gu.Size(*value)
 
 
 class EpicPyDevice(Device_base):
     def __init__(self, ot: Output_tee, device_name: str, device_folder: Path):
-        # NOTE: ot is not being used, just use Device_out(...)
+        # NOTE: ot is not being used, just use Device_out(...), or better, device_log
+        #       (see output_log), whose debug/trace messages cost nothing when off
         super(EpicPyDevice, self).__init__(device_name, ot)
 
         self.device_name = device_name
@@ -54,6 +131,8 @@ class EpicPyDevice(Device_base):
         self.rule_filename = ""  # will be adjusted automatically by simulation
 
         self.reparse_conditionstring = False
+        self._param_source = None
+        self._params = ()
 
         # EPIC Simulation controller will know device is finished when
         # self.state == self.SHUTDOWN. You may want to manage state with enums,
@@ -71,6 +150,14 @@ class EpicPyDevice(Device_base):
         # - Using a csv.writer() to ensure proper csv standards adherence!
         # - Use data.writerow(...) to save trial data (comma sep values in
         #                                              same order as header)
+        # - Rows are queued by self.data_sink and written in bulk whenever
+        #   data_buffer_rows rows or data_buffer_bytes bytes are pending, as well as
+        #   in EpicPyDevice.handle_Stop_event() (so call super().handle_Stop_event()
+        #   from yours, or self.flush_data_output()) and in finalize_data_output()
+        # - For columnar output, set data_sink to ParquetDataSink or ArrowDataSink
+        #   (see epicpydevicelib.data_sinks) and give data_filename a matching suffix
+        # - Set data_async to True to have rows written on a background thread. At
+        #   most data_queue_size rows wait in its queue, see data_writer.metrics()
         self.data_filename = "data_output.csv"
         self.data_filepath = Path(
             self.device_folder, self.data_filename
@@ -79,6 +166,38 @@ class EpicPyDevice(Device_base):
         self.data_file = None
         self.data_writer = None
         self.data_header = ()
+        self.data_sink = CSVDataSink
+        self.data_buffer_rows = 1000
+        self.data_buffer_bytes = 1 << 20
+        self.data_column_types = dict()  # optional column types for columnar sinks
+        self.data_async = False
+        self.data_queue_size = 10000
+        self._data_file_info_cache = None
+
+        # stats output
+        # - Set stats_coalesce to True to have stats_write() output collected and sent
+        #   to the Stats Output window as one update per stats_max_writes writes, or
+        #   on the first write stats_max_interval seconds after the last update, with
+        #   repeats of the same figure dropped. Any pending output is sent by
+        #   EpicPyDevice.handle_Stop_event() and finalize_data_output() (see
+        #   stats_channel)
+        # - Set stats_figure_workers to render figures on that many background threads
+        #   (output still appears in the order it was written), and stats_image_folder
+        #   to save figures there as png files that the stats window refers to,
+        #   rather than inlining them. Identical figures are only rendered once.
+        self.stats_coalesce = False
+        self.stats_max_writes = 50
+        self.stats_max_interval = 0.25
+        self.stats_figure_workers = 0
+        self.stats_image_folder = None
+        self.stats_channel = None
+
+        # names (Symbols) of the visual objects currently on the display
+        self.visible_objects = set()
+        # set to a geometric_utilities.Spatial_index to have the locations and sizes of
+        # visual objects indexed for fast hit testing, e.g. in handle_Point_event:
+        #   self.visual_index.objects_at(location) or .nearest(location, k=1)
+        self.visual_index = None
 
     """
     Methods Defined Here In EpicPyDevice
@@ -97,6 +216,9 @@ class EpicPyDevice(Device_base):
         of text (or small amounts very often) 《during》a simulation will cause
         significant slowdowns. This window is intended primarily for outputting
         statistical analyses 《after》a simulation has completed. "
+        Setting self.stats_coalesce to True batches the updates, which makes
+        occasional progress reports during a run affordable, and setting
+        self.stats_figure_workers moves figure rendering off the simulation thread.
         """
 
         if isinstance(content, str):
@@ -106,11 +228,10 @@ class EpicPyDevice(Device_base):
                 text = f'<font color="{color}">{text}</font>'
         elif isinstance(content, Figure):
             # The figure will be converted to encoded text before going to output window.
-            # https://stackoverflow.com/questions/48717794
-            temp_file = BytesIO()
-            content.savefig(temp_file, format="png")
-            encoded = base64.b64encode(temp_file.getvalue()).decode("utf-8")
-            text = f"<img src='data:image/png;base64,{encoded}'>"
+            if self._uses_stats_channel():
+                self._get_stats_channel().write_figure(content)
+                return
+            text = png_to_html(figure_to_png(content))
         elif isinstance(content, pandas.DataFrame):
             text = content.to_html()
         elif isinstance(content, (int, float, list, tuple, dict)):
@@ -121,7 +242,46 @@ class EpicPyDevice(Device_base):
             except Exception as e:
                 text = f"ERROR: epicpy_device_base:stats_write({type(content)}): {e}"
 
-        bus.emit("stats_write", text)
+        if self._uses_stats_channel():
+            self._get_stats_channel().write(text)
+        else:
+            bus.emit("stats_write", text)
+
+    def _uses_stats_channel(self) -> bool:
+        return bool(
+            self.stats_coalesce
+            or self.stats_figure_workers
+            or self.stats_image_folder is not None
+        )
+
+    def _get_stats_channel(self) -> StatsChannel:
+        channel = self.stats_channel
+        if channel is None:
+            # without coalescing, everything is sent as soon as it (and any figure
+            # written before it) is ready
+            channel = self.stats_channel = StatsChannel(
+                functools.partial(bus.emit, "stats_write"),
+                max_writes=self.stats_max_writes if self.stats_coalesce else 1,
+                max_interval=self.stats_max_interval if self.stats_coalesce else 0.0,
+                renderer=FigureRenderer(
+                    workers=self.stats_figure_workers,
+                    image_folder=self.stats_image_folder,
+                ),
+            )
+        return channel
+
+    def flush_stats_output(self):
+        """Send any stats_write() output still held by the stats channel."""
+        if self.stats_channel is not None:
+            self.stats_channel.flush()
+
+    def close_stats_output(self):
+        """
+        flush_stats_output(), waiting for any figures still being rendered, and shut
+        down the stats channel's rendering threads
+        """
+        if self.stats_channel is not None:
+            self.stats_channel.close()
 
     def get_param_list(self) -> list:
         # the device is not the place to deal with ranged condition strings. If somehow
@@ -129,14 +289,19 @@ class EpicPyDevice(Device_base):
         # elsewhere and thus this function should only be provided with a single
         # permutation. Just in case, the code below will strip off any range markers and
         # just take the first permutation
-        param_set = unpack_param_string(self.condition_string)
-        param_string = param_set[0]
-        params = param_string.split(" ")
-        return params
+        # The parsed params are cached until set_parameter_string() is called (or
+        # condition_string is replaced), so this is cheap enough for event handlers.
+        if self._param_source is not self.condition_string:
+            param_set = unpack_param_string(self.condition_string)
+            param_string = param_set[0]
+            self._params = tuple(param_string.split(" "))
+            self._param_source = self.condition_string
+        return list(self._params)
 
     def set_parameter_string(self, condition_string: str):
         self.condition_string = condition_string
         self.reparse_conditionstring = True
+        self._param_source = None
 
     def get_parameter_string(self):
         return self.condition_string
@@ -164,12 +329,16 @@ class EpicPyDevice(Device_base):
                 },
             )
         except AssertionError as e:
-            Device_out(
-                f"{e_boxed_x} ERROR in display_background parameter specification: {e}"
+            device_log.error(
+                "%s ERROR in display_background parameter specification: %s",
+                e_boxed_x,
+                e,
             )
         except FileNotFoundError as e:
-            Device_out(
-                f"{e_boxed_x} ERROR: Unable to locate view background image(s): [{e}]"
+            device_log.error(
+                "%s ERROR: Unable to locate view background image(s): [%s]",
+                e_boxed_x,
+                e,
             )
 
     def delete_data_file(self):
@@ -181,15 +350,20 @@ class EpicPyDevice(Device_base):
 
         try:
             self.data_filepath.unlink()
-            Device_out(
-                f'{e_boxed_check} Device "{self.device_name}" successfully deleted '
-                f'data output file "{str(self.data_filepath)}"'
+            device_log.info(
+                '%s Device "%s" successfully deleted data output file "%s"',
+                e_boxed_check,
+                self.device_name,
+                self.data_filepath,
             )
         except Exception as e:
-            Device_out(
-                f'{e_boxed_check} Device "{self.device_name}" reported an error while '
-                f'attempting to delete data output file "{str(self.data_filepath)}": '
-                f"[{e}]"
+            device_log.warning(
+                '%s Device "%s" reported an error while attempting to delete data '
+                'output file "%s": [%s]',
+                e_boxed_check,
+                self.device_name,
+                self.data_filepath,
+                e,
             )
 
         self.init_data_output()
@@ -201,11 +375,26 @@ class EpicPyDevice(Device_base):
 
         # extra cautious, just fail gracefully if something goes wrong or
         #  data_filepath is null
+        # The GUI polls this, so use the data sink's running counters when the file
+        # is open. Otherwise, the file is counted once (streaming) and the result is
+        # reused until the file changes.
         try:
+            writer = self.data_writer
+            if writer is not None and writer.filepath == Path(self.data_filepath):
+                return (
+                    f"Data Info: {writer.row_count()} rows "
+                    f"({writer.bytes_written} bytes)"
+                )
+
             assert self.data_filepath.is_file()
-            file_size = self.data_filepath.stat().st_size
-            rows = len(self.data_filepath.read_text().splitlines())
-            return f"Data Info: {rows - 1 if rows else 0} rows ({file_size} bytes)"
+            stat = self.data_filepath.stat()
+            key = (str(self.data_filepath), stat.st_size, stat.st_mtime_ns)
+            cache = self._data_file_info_cache
+            if cache is None or cache[0] != key:
+                cache = (key, self.data_sink.count_rows(self.data_filepath))
+                self._data_file_info_cache = cache
+            rows = cache[1]
+            return f"Data Info: {rows} rows ({stat.st_size} bytes)"
         except Exception:
             return "Data Info: ???"
 
@@ -216,32 +405,60 @@ class EpicPyDevice(Device_base):
 
         # try to open data file, don't stop on fail, just warn via device_out
         try:
-            self.data_file = open(self.data_filepath, self.data_filemode)
-        except IOError as e:
-            Device_out(
-                f"\n{e_boxed_x} WARNING: Unable to open device datafile at "
-                f"{str(self.data_filepath)} "
-                f"[{e}]!\n"
+            self.data_writer = self.data_sink(
+                self.data_filepath,
+                self.data_filemode,
+                self.data_header,
+                max_rows=self.data_buffer_rows,
+                max_bytes=self.data_buffer_bytes,
+                column_types=self.data_column_types,
+            )
+            if self.data_async:
+                self.data_writer = ThreadedDataSink(
+                    self.data_writer,
+                    max_queue=self.data_queue_size,
+                    on_error=self.report_data_output_error,
+                )
+            self.data_file = getattr(self.data_writer, "file", None)
+        except (IOError, ValueError) as e:
+            # ValueError: e.g., pyarrow.ArrowInvalid for a corrupt columnar file
+            device_log.warning(
+                "\n%s WARNING: Unable to open device datafile at %s [%s]!\n",
+                e_boxed_x,
+                self.data_filepath,
+                e,
             )
             self.data_file = None
+            self.data_writer = None
+
+    def report_data_output_error(self, e: Exception):
+        device_log.warning(
+            "\n%s WARNING: Unable to write to device datafile at %s [%s].\n",
+            e_boxed_x,
+            self.data_filepath,
+            e,
+        )
 
-        if self.data_file:
-            try:
-                self.data_writer = csv.writer(self.data_file)
-                if self.data_filemode == "w" or self.data_filepath.stat().st_size == 0:
-                    self.data_writer.writerow(self.data_header)
-            except IOError as e:
-                self.data_file.close()
-                self.data_file = None
-                self.data_writer = None
-                Device_out(
-                    f"\n{e_boxed_x} WARNING: Unable to write to device datafile at "
-                    f"{str(self.data_filepath)} [{e}].\n"
-                )
+    def flush_data_output(self):
+        """Write any rows still queued in the data sink to disk."""
+        try:
+            flush = getattr(self.data_writer, "flush", None)
+            if flush is not None:
+                flush()
+        except IOError as e:
+            self.report_data_output_error(e)
 
     def finalize_data_output(self):
+        self.close_stats_output()
+
+        # closing writes any rows still queued, so don't lose those errors
+        if self.data_writer is not None:
+            try:
+                self.data_writer.close()
+            except Exception as e:  # broad on purpose!
+                self.report_data_output_error(e)
+
         try:
-            self.data_file.flush()
             self.data_file.close()
         except Exception:  # broad on purpose!
             pass
@@ -249,6 +466,58 @@ class EpicPyDevice(Device_base):
         self.data_file = None
         self.data_writer = None
 
+    def make_visual_objects_appear(self, scene: dict):
+        """
+        Put a whole display up in one call. scene maps each object name to a dict with
+        optional "location" and "size" (Point/Size or (x, y) pairs) and "properties"
+        (a dict of property name -> value) entries, e.g.:
+
+        self.make_visual_objects_appear({
+            "Target": {
+                "location": (0, 0), "size": (1, 1), "properties": {"Color": "Red"}
+            },
+            "Fixation": {"location": (0, 0), "size": (0.5, 0.5)},
+        })
+
+        Names, property names and values may be Symbols, strings or numbers, which
+        are converted to Symbols through the shared symbol_cache.
+        """
+        symbol = _as_Symbol
+        appear = super(EpicPyDevice, self).make_visual_object_appear
+        set_property = super(EpicPyDevice, self).set_visual_object_property
+
+        for name, spec in scene.items():
+            object_name = symbol(name)
+            location = spec.get("location")
+            size = spec.get("size")
+            if location is None and size is None:
+                appear(object_name)
+            else:
+                location = _as_Point(location if location is not None else (0.0, 0.0))
+                size = _as_Size(size if size is not None else (0.0, 0.0))
+                appear(object_name, location, size)
+                if self.visual_index is not None:
+                    self.visual_index.insert(object_name, location, size)
+            self.visible_objects.add(object_name)
+
+            for property_name, property_value in spec.get("properties", {}).items():
+                set_property(object_name, symbol(property_name), symbol(property_value))
+
+    def make_visual_objects_disappear(self, object_names):
+        """Remove each of the named visual objects (Symbols or strings) from display"""
+        symbol = _as_Symbol
+        disappear = super(EpicPyDevice, self).make_visual_object_disappear
+        for name in object_names:
+            object_name = symbol(name)
+            disappear(object_name)
+            self.visible_objects.discard(object_name)
+            if self.visual_index is not None:
+                self.visual_index.remove(object_name)
+
+    def clear_visual_objects(self):
+        """Remove every visual object currently on the display"""
+        self.make_visual_objects_disappear(list(self.visible_objects))
+
     @staticmethod
     def unique_id() -> str:
         """
@@ -278,9 +547,18 @@ class EpicPyDevice(Device_base):
     # THESE METHODS DO NOTHING IN THIS CLASS; OVERRIDE ONLY THOSE NECESSARY FOR DEVICE
     # --------------------------------------------------------------------------------
 
-    def handle_Start_event(self): ...
+    def handle_Start_event(self):
+        # the same device may be run many times (e.g., by Headless_runner and
+        # Sweep_runner), so set up all per-run state (trial counters, schedules,
+        # visible objects, ...) here rather than in __init__
+        ...
 
-    def handle_Stop_event(self): ...
+    def handle_Stop_event(self):
+        # devices overriding this should call super().handle_Stop_event() (or flush
+        # themselves), otherwise queued rows only reach the disk in
+        # finalize_data_output()
+        self.flush_data_output()
+        self.close_stats_output()
 
     def handle_Report_event(self, duration: int): ...
 
@@ -320,10 +598,10 @@ class EpicPyDevice(Device_base):
     # def handle_Vocal_event(self, vocal_input: Symbol, duration: Optional[int] = None):
     #     ...
 
-    @multimethod
+    @fastmethod
     def handle_Vocal_event(self, vocal_input: Symbol): ...
 
-    @multimethod
+    @fastmethod
     def handle_Vocal_event(self, vocal_input: Symbol, duration: int): ...
 
     def handle_VisualFocusChange_event(self, object_name: Symbol): ...
@@ -340,7 +618,9 @@ class EpicPyDevice(Device_base):
         self, props: List[Symbol], values: List[Symbol], tag: Symbol
     ):
         """default response is to simply echo the information back with a dummy name"""
-        self.make_high_level_input_appear(Symbol("HLDummyObject"), props, values, tag)
+        self.make_high_level_input_appear(
+            symbol_cache("HLDummyObject"), props, values, tag
+        )
 
     def handle_HLPut_event(self, props: List[Symbol], values: List[Symbol]): ...
 
@@ -365,12 +645,13 @@ class EpicPyDevice(Device_base):
     # FUNCTIONS TO MANIPULATE THE DEVICE'S DISPLAY AND OUTPUT
     # -------------------------------------------------------
 
-    @multimethod
+    @fastmethod
     def make_visual_object_appear(self, object_name: Symbol):
         """Tell the simulated human we have a new visual object"""
         super(EpicPyDevice, self).make_visual_object_appear(object_name)
+        self.visible_objects.add(object_name)
 
-    @multimethod
+    @fastmethod
     def make_visual_object_appear(
         self,
         object_name: Symbol,
@@ -379,16 +660,23 @@ class EpicPyDevice(Device_base):
     ):
         # Tell sim. human we have new visual object with specified location & size
         super(EpicPyDevice, self).make_visual_object_appear(object_name, location, size)
+        self.visible_objects.add(object_name)
+        if self.visual_index is not None:
+            self.visual_index.insert(object_name, location, size)
 
     def set_visual_object_location(self, object_name: Symbol, new_location: gu.Point):
         """Tell the simulated human that location of a visual object has changed"""
         super(EpicPyDevice, self).set_visual_object_location(object_name, new_location)
+        if self.visual_index is not None:
+            self.visual_index.move(object_name, new_location)
 
     def set_visual_object_size(self, object_name: Symbol, new_size: gu.Size):
         """Tell the simulated human that size of a visual object has changed"""
         super(EpicPyDevice, self).set_visual_object_size(object_name, new_size)
+        if self.visual_index is not None:
+            self.visual_index.resize(object_name, new_size)
 
-    @multimethod
+    @fastmethod
     def set_visual_object_property(
         self, object_name: Symbol, property_name: Symbol, property_value: Symbol
     ):
@@ -397,7 +685,7 @@ class EpicPyDevice(Device_base):
             object_name, property_name, property_value
         )
 
-    @multimethod
+    @fastmethod
     def set_visual_object_property(
         self,
         object_name: Symbol,
@@ -406,21 +694,24 @@ class EpicPyDevice(Device_base):
     ):
         """Tell the simulated human we have a value for a property of a visual object"""
         super(EpicPyDevice, self).set_visual_object_property(
-            object_name, property_name, Symbol(str(property_value))
+            object_name, property_name, symbol_cache(str(property_value))
         )
 
-    @multimethod
+    @fastmethod
     def set_visual_object_property(
         self, object_name: Symbol, property_name: Symbol, property_value: str
     ):
         """Tell the simulated human we have a value for a property of a visual object"""
         super(EpicPyDevice, self).set_visual_object_property(
-            object_name, property_name, Symbol(property_value)
+            object_name, property_name, symbol_cache(property_value)
         )
 
     def make_visual_object_disappear(self, object_name: Symbol):
         """Tell the simulated human that a visual object is gone"""
         super(EpicPyDevice, self).make_visual_object_disappear(object_name)
+        self.visible_objects.discard(object_name)
+        if self.visual_index is not None:
+            self.visual_index.remove(object_name)
 
     def set_auditory_stream_location(self, name: Symbol, location: gu.Point):
         """A new auditory stream with location"""
@@ -509,7 +800,7 @@ class EpicPyDevice(Device_base):
         """Tell the simulated human that a High-Level input object is gone"""
         super(EpicPyDevice, self).make_high_level_input_disappear(object_name)
 
-    @multimethod
+    @fastmethod
     def schedule_delay_event(self, delay: int):
         """
         Create a device delay event with the specified contents, to arrive at the
@@ -518,11 +809,11 @@ class EpicPyDevice(Device_base):
         """
         super(EpicPyDevice, self).schedule_delay_event(delay)
 
-    @multimethod
+    @fastmethod
     def schedule_delay_event(self, delay: int, delay_type: Symbol, delay_datum: Symbol):
         super(EpicPyDevice, self).schedule_delay_event(delay, delay_type, delay_datum)
 
-    @multimethod
+    @fastmethod
     def schedule_delay_event(
         self,
         delay: int,
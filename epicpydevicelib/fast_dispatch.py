@@ -0,0 +1,289 @@
+"""
+fastmethod is a drop-in replacement for @multimethod on the hot EpicPyDevice methods.
+Overloads are declared the same way, by repeating the decorated method with different
+annotations:
+
+    @fastmethod
+    def set_visual_object_property(self, object_name: Symbol, property_name: Symbol,
+                                   property_value: Symbol): ...
+
+    @fastmethod
+    def set_visual_object_property(self, object_name: Symbol, property_name: Symbol,
+                                   property_value: str): ...
+
+Dispatch is on the types of the positional arguments after self. The first overload
+declared is taken to be the hot one: a call with exactly its annotated types (e.g., all
+Symbols) is recognized by comparing the argument types to them, without building a
+signature. Every other combination of annotated types is entered into a lookup table
+when the overload is registered, so a call with exactly those types costs one dict
+lookup. Any other combination (e.g., a subclass or bool for int) is resolved once and
+then cached. Keyword arguments are passed along but not dispatched on.
+
+Annotations may be strings (e.g., under "from __future__ import annotations"); they are
+resolved with typing.get_type_hints() when the overload is registered, and a name that
+can't be resolved raises NameError right there rather than accepting any type.
+"""
+
+import functools
+import inspect
+import itertools
+import sys
+import typing
+from typing import Callable, Dict, List, Optional, Tuple
+
+_Signature = Tuple[type, ...]
+
+
+def _annotation_types(annotation) -> Tuple[type, ...]:
+    """Flatten an annotation into the tuple of classes it accepts."""
+    if annotation is inspect.Parameter.empty:
+        return (object,)
+    if annotation is None:
+        return (type(None),)
+    if typing.get_origin(annotation) is typing.Union:
+        return tuple(
+            itertools.chain.from_iterable(
+                _annotation_types(arg) for arg in typing.get_args(annotation)
+            )
+        )
+    origin = typing.get_origin(annotation)
+    if origin is not None:
+        return (origin,)  # e.g., List[Symbol] -> list
+    if isinstance(annotation, type):
+        return (annotation,)
+    return (object,)
+
+
+# default for unused positional parameters of a fastmethod
+_NA = object()
+
+
+class FastMethodDispatcher:
+    """
+    Overload registry and type-signature cache behind a fastmethod.
+    The method itself is a plain function (see make_method()) so that binding it to an
+    instance costs no more than binding any other method.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.overloads: List[Tuple[Tuple[Tuple[type, ...], ...], int, Callable]] = []
+        self.cache: Dict[_Signature, Callable] = dict()
+
+    def register(self, func: Callable):
+        params = list(inspect.signature(func).parameters.values())[1:]  # skip self
+        positional = [
+            p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+        ]
+        hints = typing.get_type_hints(func)  # resolves string annotations
+        param_types = tuple(
+            _annotation_types(hints.get(p.name, p.annotation)) for p in positional
+        )
+        required = sum(1 for p in positional if p.default is p.empty)
+        self.overloads.append((param_types, required, func))
+
+        # precompute every exact signature this overload declares
+        for n in range(required, len(param_types) + 1):
+            for signature in itertools.product(*param_types[:n]):
+                self.cache[signature] = func
+
+    def resolve(self, signature: _Signature) -> Callable:
+        """Find (and cache) the most specific overload accepting these arg types."""
+        best, best_score = None, None
+        for param_types, required, func in self.overloads:
+            if not required <= len(signature) <= len(param_types):
+                continue
+            score = 0
+            for arg_type, accepted in zip(signature, param_types):
+                distances = [
+                    arg_type.__mro__.index(cls)
+                    for cls in accepted
+                    if cls in arg_type.__mro__
+                ]
+                if not distances:
+                    break
+                score += min(distances)
+            else:
+                if best_score is None or score < best_score:
+                    best, best_score = func, score
+
+        if best is None:
+            raise TypeError(
+                f"{self.name}(): no overload accepts arguments of types "
+                f"({', '.join(t.__name__ for t in signature)})"
+            )
+        self.cache[signature] = best
+        return best
+
+    def dispatch(self, instance, *args, **kwargs):
+        """General path: any number of positional args, keyword args passed along."""
+        signature = tuple(map(type, args))
+        try:
+            target = self.cache[signature]
+        except KeyError:
+            target = self.resolve(signature)
+        return target(instance, *args, **kwargs)
+
+    def fast_signature(self) -> Optional[_Signature]:
+        """
+        The exact signature of the first overload, if it has 1 to 4 positional
+        parameters, none optional, each annotated with a single class.
+        """
+        param_types, required, _ = self.overloads[0]
+        if not 1 <= required == len(param_types) <= 4:
+            return None
+        if any(len(accepted) != 1 or object in accepted for accepted in param_types):
+            return None
+        return tuple(accepted[0] for accepted in param_types)
+
+    def make_method(self, func: Callable) -> Callable:
+        """
+        The method for the overloads registered so far (fastmethod() makes a new one
+        for each overload, so the fast path calls whichever overload won its
+        signature).
+        """
+        cache = self.cache
+        resolve = self.resolve
+        dispatch = self.dispatch
+
+        # Forwarding *args is surprisingly costly, so up to 4 positional args are
+        # taken as ordinary parameters and forwarded as such. Anything else goes
+        # through dispatch().
+        def call(instance, a, b, c, d, rest, kwargs):
+            if rest or kwargs or a is _NA:
+                args = tuple(x for x in (a, b, c, d) if x is not _NA) + rest
+                return dispatch(instance, *args, **kwargs)
+            if b is _NA:
+                signature = (type(a),)
+                target = cache.get(signature) or resolve(signature)
+                return target(instance, a)
+            if c is _NA:
+                signature = (type(a), type(b))
+                target = cache.get(signature) or resolve(signature)
+                return target(instance, a, b)
+            if d is _NA:
+                signature = (type(a), type(b), type(c))
+                target = cache.get(signature) or resolve(signature)
+                return target(instance, a, b, c)
+            signature = (type(a), type(b), type(c), type(d))
+            target = cache.get(signature) or resolve(signature)
+            return target(instance, a, b, c, d)
+
+        signature = self.fast_signature()
+        if signature is None:
+
+            def method(instance, a=_NA, b=_NA, c=_NA, d=_NA, *rest, **kwargs):
+                return call(instance, a, b, c, d, rest, kwargs)
+
+        else:
+            # checks are ordered so that leftover args (b, c, d or rest) always fail
+            # one of them
+            fast = cache[signature]
+            A, B, C, D = signature + (None,) * (4 - len(signature))
+            if len(signature) == 1:
+
+                def method(instance, a=_NA, b=_NA, c=_NA, d=_NA, *rest, **kwargs):
+                    if type(a) is A and b is _NA and not kwargs:
+                        return fast(instance, a)
+                    return call(instance, a, b, c, d, rest, kwargs)
+
+            elif len(signature) == 2:
+
+                def method(instance, a=_NA, b=_NA, c=_NA, d=_NA, *rest, **kwargs):
+                    if type(a) is A and type(b) is B and c is _NA and not kwargs:
+                        return fast(instance, a, b)
+                    return call(instance, a, b, c, d, rest, kwargs)
+
+            elif len(signature) == 3:
+
+                def method(instance, a=_NA, b=_NA, c=_NA, d=_NA, *rest, **kwargs):
+                    if (
+                        type(a) is A
+                        and type(b) is B
+                        and type(c) is C
+                        and d is _NA
+                        and not kwargs
+                    ):
+                        return fast(instance, a, b, c)
+                    return call(instance, a, b, c, d, rest, kwargs)
+
+            else:
+
+                def method(instance, a=_NA, b=_NA, c=_NA, d=_NA, *rest, **kwargs):
+                    if (
+                        type(a) is A
+                        and type(b) is B
+                        and type(c) is C
+                        and type(d) is D
+                        and not (rest or kwargs)
+                    ):
+                        return fast(instance, a, b, c, d)
+                    return call(instance, a, b, c, d, rest, kwargs)
+
+        functools.update_wrapper(method, func)
+        method.dispatcher = self
+        return method
+
+
+def fastmethod(func: Callable) -> Callable:
+    """
+    Decorator that registers func as an overload of the same-named method in the
+    class body being defined (like multimethod), creating the dispatcher if needed.
+    """
+    namespace = sys._getframe(1).f_locals
+    existing = namespace.get(func.__name__)
+    dispatcher = getattr(existing, "dispatcher", None)
+    if isinstance(dispatcher, FastMethodDispatcher):
+        dispatcher.register(func)
+        method = dispatcher.make_method(existing.__wrapped__)
+        method.__doc__ = existing.__doc__ or func.__doc__
+        return method
+
+    dispatcher = FastMethodDispatcher(func.__name__)
+    dispatcher.register(func)
+    return dispatcher.make_method(func)
+
+
+if __name__ == "__main__":
+    # micro-benchmark: per-call overhead of multimethod vs fastmethod vs a plain method
+    import timeit
+    from typing import Union
+
+    from multimethod import multimethod
+
+    class Multi:
+        @multimethod
+        def set_property(self, name: str, prop: str, value: str):
+            return value
+
+        @multimethod
+        def set_property(self, name: str, prop: str, value: Union[int, float]):
+            return value
+
+    class Fast:
+        @fastmethod
+        def set_property(self, name: str, prop: str, value: str):
+            return value
+
+        @fastmethod
+        def set_property(self, name: str, prop: str, value: Union[int, float]):
+            return value
+
+    class Plain:
+        def set_property(self, name: str, prop: str, value):
+            return value
+
+    n = 200_000
+    for label, obj in (
+        ("multimethod", Multi()),
+        ("fastmethod", Fast()),
+        ("plain", Plain()),
+    ):
+        assert obj.set_property("Obj1", "Color", 1.5) == 1.5
+        assert obj.set_property("Obj1", "Color", "Red") == "Red"
+        seconds = min(
+            timeit.repeat(
+                lambda: obj.set_property("Obj1", "Color", "Red"), number=n, repeat=5
+            )
+        )
+        print(f"{label:>12}: {seconds / n * 1e9:7.1f} ns/call")
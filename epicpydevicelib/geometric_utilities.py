@@ -1,6 +1,8 @@
+import heapq
 import math
-from typing import List
+from typing import Dict, Hashable, List, Optional, Sequence, Set, Tuple, Union
 
+import numpy as np
 from epiclibcpp.epiclib import geometric_utilities as gu
 from multimethod import multimethod
 
@@ -40,6 +42,11 @@ the endpoints of a set of line segments. The last Point wraps around to the firs
 to define the last line segment making up the polygon. A distance_inside function
 is used to compute whether a Point is inside the polygon and the distance of the Point
 from the nearest line segment.
+
+The *_array functions at the end of this module are NumPy counterparts of the scalar
+functions for analyses over many samples (e.g., every eye or pointer position in a
+run). They take (N, 2) arrays (or sequences of Points/Sizes) and return arrays,
+matching the scalar versions numerically. Arrays of shape (2,) broadcast against (N, 2).
 """
 
 GU_pi = math.pi
@@ -347,6 +354,325 @@ def units_per_degree_subtended(
     return gu.units_per_degree_subtended(units_per_measure, distance_measure)
 
 
+""" Array (vectorized) counterparts """
+
+ArrayLike = Union[np.ndarray, Sequence]
+
+
+def as_point_array(points: ArrayLike) -> np.ndarray:
+    """Convert a Point, a sequence of Points, or (x, y) pairs to a float (N, 2) array"""
+    if isinstance(points, gu.Point):
+        return np.array([points.x, points.y], dtype=float)
+    if len(points) and isinstance(points[0], gu.Point):
+        return np.array([(p.x, p.y) for p in points], dtype=float)
+    return np.asarray(points, dtype=float)
+
+
+def as_size_array(sizes: ArrayLike) -> np.ndarray:
+    """Convert a Size, a sequence of Sizes, or (h, v) pairs to a float (N, 2) array"""
+    if isinstance(sizes, gu.Size):
+        return np.array([sizes.h, sizes.v], dtype=float)
+    if len(sizes) and isinstance(sizes[0], gu.Size):
+        return np.array([(s.h, s.v) for s in sizes], dtype=float)
+    return np.asarray(sizes, dtype=float)
+
+
+def cartesian_distance_array(p1: ArrayLike, p2: ArrayLike) -> np.ndarray:
+    """return the distances between two arrays of points"""
+    delta = as_point_array(p1) - as_point_array(p2)
+    return np.hypot(delta[..., 0], delta[..., 1])
+
+
+def is_point_inside_rectangle_array(
+    p: ArrayLike, rect_loc: ArrayLike, rect_size: ArrayLike
+) -> np.ndarray:
+    """
+    Array version of is_point_inside_rectangle(), rect_loc is the center of each
+    rectangle. Points on the edge count as inside.
+    """
+    offset = np.abs(as_point_array(p) - as_point_array(rect_loc))
+    half = as_size_array(rect_size) / 2.0
+    return np.all(offset <= half, axis=-1)
+
+
+def closest_distance_array(
+    p: ArrayLike, rect_center: ArrayLike, rect_size: ArrayLike
+) -> np.ndarray:
+    """
+    Array version of closest_distance(). For points outside a rectangle this is the
+    distance to the nearest point on it, for points inside it is the distance to the
+    nearest edge.
+    """
+    offset = np.abs(as_point_array(p) - as_point_array(rect_center))
+    half = as_size_array(rect_size) / 2.0
+    outside = np.maximum(offset - half, 0.0)
+    inside = np.all(offset <= half, axis=-1)
+    return np.where(
+        inside,
+        np.min(half - offset, axis=-1),
+        np.hypot(outside[..., 0], outside[..., 1]),
+    )
+
+
+def degrees_subtended_array(
+    size_measure: ArrayLike, distance_measure: ArrayLike
+) -> np.ndarray:
+    """Array version of degrees_subtended()"""
+    size_measure = np.asarray(size_measure, dtype=float)
+    distance_measure = np.asarray(distance_measure, dtype=float)
+    with np.errstate(divide="ignore"):
+        return np.degrees(2.0 * np.arctan(size_measure / (2.0 * distance_measure)))
+
+
+def distance_from_segment_array(
+    p1: ArrayLike, p2: ArrayLike, p: ArrayLike
+) -> np.ndarray:
+    """
+    Array version of Line_segment(p1, p2).distance_from_segment(p): the distance from
+    each point to the closest point on its segment. Zero-length segments give nan,
+    as in the scalar version.
+    """
+    p1 = as_point_array(p1)
+    p2 = as_point_array(p2)
+    p = as_point_array(p)
+    d = p2 - p1
+    v = p - p1
+    length_sq = np.sum(d * d, axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.sum(v * d, axis=-1) / length_sq
+        perpendicular = np.abs(v[..., 0] * d[..., 1] - v[..., 1] * d[..., 0]) / np.sqrt(
+            length_sq
+        )
+    to_p1 = np.hypot(v[..., 0], v[..., 1])
+    w = p - p2
+    to_p2 = np.hypot(w[..., 0], w[..., 1])
+    return np.where(t < 0.0, to_p1, np.where(t > 1.0, to_p2, perpendicular))
+
+
+def distance_inside_polygon_array(vertices: ArrayLike, p: ArrayLike) -> np.ndarray:
+    """
+    Array version of Polygon(vertices).distance_inside(p) for an (N, 2) array of
+    points: the distance of each point from the nearest edge, positive inside the
+    polygon and negative outside.
+    """
+    vertices = as_point_array(vertices)
+    p = as_point_array(p)
+    points = np.atleast_2d(p)
+    starts = vertices
+    ends = np.roll(vertices, -1, axis=0)
+
+    # (N, M) distances from every point to every edge
+    distances = distance_from_segment_array(
+        starts[np.newaxis, :, :], ends[np.newaxis, :, :], points[:, np.newaxis, :]
+    )
+    nearest = np.min(distances, axis=1)
+
+    # even-odd rule: count edges crossed by a ray from each point towards +x
+    x = points[:, 0:1]
+    y = points[:, 1:2]
+    x1, y1 = starts[:, 0], starts[:, 1]
+    x2, y2 = ends[:, 0], ends[:, 1]
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    crossings = np.sum(straddles & (x < x_cross), axis=1)
+    inside = crossings % 2 == 1
+
+    result = np.where(inside, nearest, -nearest)
+    return result if p.ndim > 1 else result[0]
+
+
+""" Spatial index """
+
+
+class Spatial_index:
+    """
+    A uniform-grid index of rectangles (given by center and size, like visual objects)
+    for fast hit testing on dense displays. Each rectangle is stored in every grid cell
+    it overlaps, so queries only examine objects in nearby cells rather than every
+    object on the display. Pick cell_size near the typical object size.
+
+    Keys can be anything hashable, EpicPyDevice uses the object name Symbols.
+    Distances are from the point to the nearest point of the rectangle, and are 0 for
+    points inside it (unlike closest_distance(), which measures to the nearest edge).
+
+    insert(), move(), resize(), remove(), clear() - keep the index up to date
+    objects_at(p) - keys of rectangles containing p (edges included)
+    within_radius(p, r) - (key, distance) pairs within r of p, nearest first
+    nearest(p, k) - the k nearest (key, distance) pairs, nearest first
+    """
+
+    def __init__(self, cell_size: float = 1.0):
+        assert cell_size > 0, "cell_size must be positive"
+        self.cell_size = float(cell_size)
+        self.objects: Dict[Hashable, Tuple[float, float, float, float]] = dict()
+        self.cells: Dict[Tuple[int, int], Set[Hashable]] = dict()
+        # range of cell indices ever occupied (i1, j1, i2, j2), bounds nearest()
+        self.bounds: Optional[Tuple[int, int, int, int]] = None
+        # sizes given by resize() for keys that have no location yet, used by move()
+        self.pending_sizes: Dict[Hashable, Tuple[float, float]] = dict()
+
+    def __len__(self) -> int:
+        return len(self.objects)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.objects
+
+    @staticmethod
+    def _xy(p) -> Tuple[float, float]:
+        if isinstance(p, gu.Point):
+            return p.x, p.y
+        return float(p[0]), float(p[1])
+
+    @staticmethod
+    def _hv(size) -> Tuple[float, float]:
+        if isinstance(size, gu.Size):
+            return size.h, size.v
+        return float(size[0]), float(size[1])
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return math.floor(x / self.cell_size), math.floor(y / self.cell_size)
+
+    def _cell_range(self, rect: Tuple[float, float, float, float]):
+        x, y, h, v = rect
+        i1, j1 = self._cell(x - h / 2.0, y - v / 2.0)
+        i2, j2 = self._cell(x + h / 2.0, y + v / 2.0)
+        for i in range(i1, i2 + 1):
+            for j in range(j1, j2 + 1):
+                yield i, j
+
+    @staticmethod
+    def _distance(rect: Tuple[float, float, float, float], x: float, y: float) -> float:
+        cx, cy, h, v = rect
+        dx = max(abs(x - cx) - h / 2.0, 0.0)
+        dy = max(abs(y - cy) - v / 2.0, 0.0)
+        return math.hypot(dx, dy)
+
+    def insert(self, key: Hashable, center, size=(0.0, 0.0)):
+        """add a rectangle, replacing any previous one with the same key"""
+        if key in self.objects:
+            self.remove(key)
+        self.pending_sizes.pop(key, None)
+        rect = self._xy(center) + self._hv(size)
+        self.objects[key] = rect
+        for cell in self._cell_range(rect):
+            self.cells.setdefault(cell, set()).add(key)
+
+        x, y, h, v = rect
+        i1, j1 = self._cell(x - h / 2.0, y - v / 2.0)
+        i2, j2 = self._cell(x + h / 2.0, y + v / 2.0)
+        if self.bounds is not None:
+            b1, b2, b3, b4 = self.bounds
+            i1, j1, i2, j2 = min(i1, b1), min(j1, b2), max(i2, b3), max(j2, b4)
+        self.bounds = (i1, j1, i2, j2)
+
+    def move(self, key: Hashable, center):
+        """
+        new center for a rectangle (unknown keys are inserted with the size last given
+        to resize(), or size 0)
+        """
+        rect = self.objects.get(key)
+        if rect is None:
+            self.insert(key, center, self.pending_sizes.get(key, (0.0, 0.0)))
+        else:
+            self.insert(key, center, rect[2:])
+
+    def resize(self, key: Hashable, size):
+        """new size for a rectangle, kept for move() if the key has no location yet"""
+        rect = self.objects.get(key)
+        if rect is not None:
+            self.insert(key, rect[:2], size)
+        else:
+            self.pending_sizes[key] = self._hv(size)
+
+    def remove(self, key: Hashable):
+        self.pending_sizes.pop(key, None)
+        rect = self.objects.pop(key, None)
+        if rect is None:
+            return
+        for cell in self._cell_range(rect):
+            keys = self.cells.get(cell)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.cells[cell]
+
+    def clear(self):
+        self.objects.clear()
+        self.cells.clear()
+        self.pending_sizes.clear()
+        self.bounds = None
+
+    def objects_at(self, p) -> List[Hashable]:
+        x, y = self._xy(p)
+        keys = self.cells.get(self._cell(x, y), ())
+        return [
+            key
+            for key in keys
+            if abs(x - self.objects[key][0]) <= self.objects[key][2] / 2.0
+            and abs(y - self.objects[key][1]) <= self.objects[key][3] / 2.0
+        ]
+
+    def within_radius(self, p, radius: float) -> List[Tuple[Hashable, float]]:
+        x, y = self._xy(p)
+        i1, j1 = self._cell(x - radius, y - radius)
+        i2, j2 = self._cell(x + radius, y + radius)
+        found = dict()
+        for i in range(i1, i2 + 1):
+            for j in range(j1, j2 + 1):
+                for key in self.cells.get((i, j), ()):
+                    if key not in found:
+                        found[key] = self._distance(self.objects[key], x, y)
+        return sorted(
+            ((key, d) for key, d in found.items() if d <= radius), key=lambda kd: kd[1]
+        )
+
+    def nearest(self, p, k: int = 1) -> List[Tuple[Hashable, float]]:
+        """
+        Search outward from p's cell one ring of cells at a time, stopping once no
+        unvisited cell could hold anything closer than the k-th best found so far.
+        Only the part of each ring inside the occupied bounds is visited, and the
+        search starts at the first ring that reaches them, so points far off the
+        display cost no more than points on it.
+        """
+        if not self.objects or k < 1:
+            return []
+        x, y = self._xy(p)
+        ci, cj = self._cell(x, y)
+        i1, j1, i2, j2 = self.bounds
+        # rings before this one don't reach the bounds, beyond max_ring there is
+        # nothing left to find
+        min_ring = max(i1 - ci, ci - i2, j1 - cj, cj - j2, 0)
+        max_ring = max(ci - i1, i2 - ci, cj - j1, j2 - cj, 0)
+
+        found: Dict[Hashable, float] = dict()
+        for ring in range(min_ring, max_ring + 1):
+            if ring == 0:
+                ring_cells = [(ci, cj)]
+            else:
+                ring_cells = [
+                    (i, j)
+                    for j in (cj - ring, cj + ring)
+                    if j1 <= j <= j2
+                    for i in range(max(ci - ring, i1), min(ci + ring, i2) + 1)
+                ] + [
+                    (i, j)
+                    for i in (ci - ring, ci + ring)
+                    if i1 <= i <= i2
+                    for j in range(max(cj - ring + 1, j1), min(cj + ring - 1, j2) + 1)
+                ]
+            for cell in ring_cells:
+                for key in self.cells.get(cell, ()):
+                    if key not in found:
+                        found[key] = self._distance(self.objects[key], x, y)
+            if len(found) >= k:
+                best = heapq.nsmallest(k, found.items(), key=lambda kd: kd[1])
+                # cells in the next ring are at least ring * cell_size away
+                if best[-1][1] <= ring * self.cell_size:
+                    return best
+        return heapq.nsmallest(k, found.items(), key=lambda kd: kd[1])
+
+
 if __name__ == "__main__":
     p1 = Point(10, 20)
     p2 = Point(-10, -20)
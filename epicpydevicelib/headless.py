@@ -0,0 +1,299 @@
+"""
+Headless_runner runs simulations of an EpicPyDevice without the EPICpy gui, e.g., for
+batches of thousands of runs on a compute node:
+
+    runner = Headless_runner(EpicDevice, "rules/choice_task.prs")
+    for condition in unpack_param_string("10 [Easy|Hard] [Dash|HUD]"):
+        runner.run(condition, seed=1234)
+    runner.close()
+    print(runner.report())
+
+Nothing the device sends to the gui is lost or left waiting on a listener:
+- Device_out and Normal_out (Output_tees) discard their text unless a stream is
+  attached, and the runner attaches none unless given output_file
+- the bus events the gui normally handles ("stats_write", "background_image", ...)
+  go to a Bus_event_sink, which only counts them (and, if given bus_log, appends
+  them to a file)
+
+The simulated clock is under the caller's control: start() initializes a run (the
+device's handle_Start_event()), advance() moves it forward by a given number of
+simulated milliseconds, and stop() ends it (handle_Stop_event()). run() does all
+three, advancing time_step ms at a time until the device shuts down or max_time is
+reached. Runs/sec (and simulated ms per wall-clock second) are kept in metrics().
+"""
+
+import inspect
+import random
+import time
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    NamedTuple,
+    Optional,
+    TextIO,
+    Union,
+)
+
+from epiclibcpp.epiclib import Model, Output_tee
+from epiclibcpp.epiclib.output_tee_globals import Device_out, Normal_out
+
+from epicpydevicelib.device_emitter import InstrumentedEventEmitter, bus
+from epicpydevicelib.epicpy_device_base import EpicPyDevice
+from epicpydevicelib import random_utilities
+
+_GUI_EVENTS = ("stats_write", "background_image")
+
+
+class Run_result(NamedTuple):
+    condition: str
+    seed: Optional[int]
+    sim_time: int
+    wall_time: float
+    completed: bool  # False if the run was cut off at max_time
+
+
+class Bus_event_sink:
+    """
+    Stands in for the gui on the event bus: counts each event by name and, if
+    log_file is given, writes one line per event to it.
+    """
+
+    def __init__(
+        self,
+        events: Iterable[str] = _GUI_EVENTS,
+        log_file: Optional[Union[str, Path]] = None,
+    ):
+        self.events = tuple(events)
+        self.counts: Dict[str, int] = {event: 0 for event in self.events}
+        self.log_file = Path(log_file) if log_file is not None else None
+        self._log: Optional[TextIO] = None
+        self._emitter: Optional[InstrumentedEventEmitter] = None
+        self._listeners: Dict[str, Callable] = dict()
+
+    def _listener(self, event: str) -> Callable:
+        counts = self.counts
+
+        def listener(*args, **kwargs):
+            counts[event] += 1
+            if self._log is not None:
+                payload = args[0] if len(args) == 1 else args
+                self._log.write(f"{event}\t{payload}\n")
+
+        return listener
+
+    def attach(self, emitter: InstrumentedEventEmitter = bus):
+        self.detach()
+        if self.log_file is not None:
+            self._log = open(self.log_file, "a", encoding="utf-8")
+        self._emitter = emitter
+        for event in self.events:
+            listener = self._listeners[event] = self._listener(event)
+            emitter.on(event, listener)
+
+    def detach(self):
+        if self._emitter is not None:
+            for event, listener in self._listeners.items():
+                self._emitter.remove_listener(event, listener)
+            self._emitter = None
+            self._listeners = dict()
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+
+class _Output_stream:
+    """py stream for an Output_tee, writing to an open text file"""
+
+    def __init__(self, file: TextIO):
+        self.file = file
+
+    def write(self, text: str):
+        self.file.write(text)
+
+    def flush(self):
+        self.file.flush()
+
+
+class Headless_runner:
+    """
+    Runs a device and its rules with the EPIC Model, no gui attached.
+    device - an EpicPyDevice, or a device class to be called as
+             device(output_tee, device_name, device_folder)
+    time_step - simulated ms per run_time() call in run()
+    output_tee - the Output_tee handed to a device class, Device_out if not given.
+                 epiclib's Output_tee has no Python constructor, so a private tee
+                 can't be made here; the device's own output (device_log) goes to
+                 Device_out regardless, which has no streams unless output_file
+                 (or somebody else in this process) attaches one.
+    output_file - if given, output_tee, Device_out and Normal_out text is appended
+                  to this file
+    bus_log - if given, gui bus events are appended to this file (see Bus_event_sink)
+    start()/advance()/stop() - drive one run by hand
+    run() - one complete run, returns a Run_result
+    metrics() - runs, simulated and wall time, runs/sec
+    report() - metrics as text; close() - detach from the bus and the Output_tees
+    """
+
+    def __init__(
+        self,
+        device: Union[EpicPyDevice, Callable[..., EpicPyDevice]],
+        rule_file: Union[str, Path],
+        time_step: int = 1000,
+        device_name: Optional[str] = None,
+        device_folder: Optional[Union[str, Path]] = None,
+        output_file: Optional[Union[str, Path]] = None,
+        bus_log: Optional[Union[str, Path]] = None,
+        output_tee: Optional[Output_tee] = None,
+    ):
+        self.output_tee = Device_out if output_tee is None else output_tee
+        if not isinstance(device, EpicPyDevice):
+            device_name = device_name or getattr(device, "__name__", "Device")
+            device_folder = Path(device_folder or Path(inspect.getfile(device)).parent)
+            device = device(self.output_tee, device_name, device_folder)
+        self.device = device
+        self.rule_file = Path(rule_file).resolve()
+        self.time_step = time_step
+
+        self.bus_sink = Bus_event_sink(log_file=bus_log)
+        self.bus_sink.attach()
+        self._output = None
+        if output_file is not None:
+            self._output = _Output_stream(open(output_file, "a", encoding="utf-8"))
+            for tee in self._output_tees():
+                tee.add_py_stream(self._output)
+
+        # (set before compiling, close() relies on them if compiling fails)
+        self.runs = 0
+        self.sim_time = 0
+        self.wall_time = 0.0
+        self.results: List[Run_result] = []
+        self.keep_results = True
+        self.running = False
+        self._condition = ""
+        self._seed = None
+        self._start = 0.0
+
+        self.model = Model(self.device)
+        self.model.interconnect_device_and_human()
+        self.model.set_prs_filename(str(self.rule_file))
+        if not self.model.compile():
+            self.close()
+            raise RuntimeError(f"Unable to compile rule file {self.rule_file}")
+
+    def start(self, condition: str, seed: Optional[int] = None):
+        """Begin a run: the device's handle_Start_event() is called at time 0."""
+        if self.running:
+            self.stop()
+        if seed is not None:
+            random_utilities.set_random_number_generator_seed(seed)
+            random_utilities.rng_registry.set_master_seed(seed)
+            random.seed(seed)
+        self._condition, self._seed = condition, seed
+        self._start = time.perf_counter()
+        self.running = True
+
+        device = self.device
+        if device.data_writer is None:
+            device.init_data_output()  # (the gui would have done this)
+        device.state = 0
+        device.set_parameter_string(condition)
+        self.model.initialize()
+
+    def advance(self, duration: int) -> bool:
+        """Run duration simulated ms, returns False once the device has shut down."""
+        running = self.model.run_time(duration)
+        return running and self.device.state != self.device.SHUTDOWN
+
+    def stop(self, completed: bool = True) -> Run_result:
+        """End the run: the device's handle_Stop_event() is called."""
+        self.model.stop()
+        # in case the device's handle_Stop_event() didn't call super()
+        self.device.flush_data_output()
+        self.device.close_stats_output()
+        wall_time = time.perf_counter() - self._start
+        self.running = False
+        result = Run_result(
+            self._condition, self._seed, self.model.get_time(), wall_time, completed
+        )
+        self.runs += 1
+        self.sim_time += result.sim_time
+        self.wall_time += wall_time
+        if self.keep_results:
+            self.results.append(result)
+        return result
+
+    def run(
+        self, condition: str, seed: Optional[int] = None, max_time: Optional[int] = None
+    ) -> Run_result:
+        self.start(condition, seed)
+        completed = True
+        while self.advance(self.time_step):
+            if max_time is not None and self.model.get_time() >= max_time:
+                completed = False
+                break
+        return self.stop(completed)
+
+    def metrics(self) -> dict:
+        wall_time = self.wall_time
+        return {
+            "runs": self.runs,
+            "sim_time": self.sim_time,
+            "wall_time": wall_time,
+            "runs_per_sec": self.runs / wall_time if wall_time else 0.0,
+            "sim_ms_per_sec": self.sim_time / wall_time if wall_time else 0.0,
+            "bus_events": dict(self.bus_sink.counts),
+        }
+
+    def report(self) -> str:
+        m = self.metrics()
+        events = ", ".join(f"{n} {event}" for event, n in m["bus_events"].items())
+        return (
+            f"{m['runs']} runs in {m['wall_time']:.2f} sec: "
+            f"{m['runs_per_sec']:.1f} runs/sec, "
+            f"{m['sim_ms_per_sec']:.0f} simulated ms/sec ({events})\n"
+        )
+
+    def _output_tees(self) -> List[Output_tee]:
+        tees = [Device_out, Normal_out]
+        if not any(tee is self.output_tee for tee in tees):
+            tees.append(self.output_tee)
+        return tees
+
+    def close(self):
+        if self.running:
+            self.stop()
+        self.bus_sink.detach()
+        if self._output is not None:
+            for tee in self._output_tees():
+                tee.remove_py_stream(self._output)
+            self._output.file.close()
+            self._output = None
+        self.device.finalize_data_output()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+if __name__ == "__main__":
+    import importlib
+    import sys
+
+    # usage: python -m epicpydevicelib.headless device_module.DeviceClass rules.prs
+    #        [condition] [runs]
+
+    module_name, class_name = sys.argv[1].rsplit(".", 1)
+    device_class = getattr(importlib.import_module(module_name), class_name)
+    condition = sys.argv[3] if len(sys.argv) > 3 else ""
+    runs = int(sys.argv[4]) if len(sys.argv) > 4 else 100
+
+    with Headless_runner(device_class, sys.argv[2]) as runner:
+        runner.keep_results = False
+        for seed in range(runs):
+            runner.run(condition, seed=seed)
+        print(runner.report(), end="")
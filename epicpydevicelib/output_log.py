@@ -0,0 +1,198 @@
+"""
+Leveled, lazily formatted writing to the EPIC Output_tees. Each Output_log wraps one
+Output_tee and drops messages below its level before doing any formatting, so a
+debug or trace message costs next to nothing while those levels are off:
+
+    from epicpydevicelib.output_log import device_log, DEBUG
+
+    device_log.debug("trial %d: target at %s", trial, location)  # %-style, lazy
+    device_log.debug(lambda: f"scene: {self.scene.objects}")      # callable, lazy
+    device_log.warning("Unable to open %s", path)
+
+    device_log.level = DEBUG  # (or set_level(DEBUG) for all of the logs)
+
+In ring-buffer mode (ring_size > 0), messages below flush_level are not written but
+kept, unformatted, in memory, the last ring_size of them. They are only written when
+a message at flush_level (ERROR by default) arrives, so the lead-up to an error is
+still on record, or when flush() is called. guard() does the same for an exception
+escaping a block of code.
+"""
+
+import contextlib
+import traceback
+from collections import deque
+from typing import Callable, Deque, Iterator, Optional, Tuple, Union
+
+from epiclibcpp.epiclib import Output_tee
+from epiclibcpp.epiclib.output_tee_globals import (
+    Debug_out,
+    Device_out,
+    Normal_out,
+    Trace_out,
+)
+
+DEBUG = 10
+TRACE = 15
+INFO = 20
+WARNING = 30
+ERROR = 40
+
+_LEVELS = {
+    "DEBUG": DEBUG,
+    "TRACE": TRACE,
+    "INFO": INFO,
+    "WARNING": WARNING,
+    "ERROR": ERROR,
+}
+
+Message = Union[str, Callable[[], str]]
+
+
+def _as_level(level: Union[int, str]) -> int:
+    return _LEVELS[level.upper()] if isinstance(level, str) else int(level)
+
+
+def format_message(message: Message, args: tuple) -> str:
+    try:
+        if callable(message):
+            text = str(message())
+        elif args:
+            text = message % args
+        else:
+            text = str(message)
+    except Exception as e:
+        text = f"{message!r} {args!r} (unable to format message: {e})"
+    return text if text.endswith("\n") else text + "\n"
+
+
+class Output_log:
+    """
+    tee - the Output_tee written to (e.g., Device_out)
+    level - messages below this level are dropped
+    ring_size - if > 0, keep the last ring_size messages below flush_level in memory
+                instead of writing them, see module docstring
+    enabled_for() - whether a message at this level would be kept, for guarding
+                    expensive argument computations
+    debug()/trace()/info()/warning()/error()/log() - write a message, formatted as
+                    message % args, or message() if message is callable
+    flush() - write any messages held in the ring buffer
+    guard() - context manager writing the ring buffer and the traceback of any
+              exception raised inside it (which is then re-raised)
+    """
+
+    def __init__(
+        self,
+        tee: Output_tee,
+        level: Union[int, str] = INFO,
+        ring_size: int = 0,
+        flush_level: Union[int, str] = ERROR,
+    ):
+        self.tee = tee
+        self.level = _as_level(level)
+        self.flush_level = _as_level(flush_level)
+        self.ring: Optional[Deque[Tuple[Message, tuple]]] = None
+        self.set_ring_size(ring_size)
+
+    def set_ring_size(self, ring_size: int):
+        """0 turns ring-buffer mode off (writing out anything still held)."""
+        if self.ring:
+            self.flush()
+        self.ring = deque(maxlen=ring_size) if ring_size > 0 else None
+
+    def enabled_for(self, level: int) -> bool:
+        return level >= self.level
+
+    def log(self, level: int, message: Message, *args):
+        if level < self.level:
+            return
+        if self.ring is not None:
+            if level < self.flush_level:
+                self.ring.append((message, args))
+                return
+            self.flush()
+        self.tee(format_message(message, args))
+
+    def debug(self, message: Message, *args):
+        if DEBUG >= self.level:
+            self.log(DEBUG, message, *args)
+
+    def trace(self, message: Message, *args):
+        if TRACE >= self.level:
+            self.log(TRACE, message, *args)
+
+    def info(self, message: Message, *args):
+        if INFO >= self.level:
+            self.log(INFO, message, *args)
+
+    def warning(self, message: Message, *args):
+        if WARNING >= self.level:
+            self.log(WARNING, message, *args)
+
+    def error(self, message: Message, *args):
+        if ERROR >= self.level:
+            self.log(ERROR, message, *args)
+
+    def flush(self):
+        ring = self.ring
+        if not ring:
+            return
+        tee = self.tee
+        while ring:
+            tee(format_message(*ring.popleft()))
+
+    @contextlib.contextmanager
+    def guard(self) -> Iterator["Output_log"]:
+        try:
+            yield self
+        except Exception:
+            self.flush()
+            self.tee(traceback.format_exc())
+            raise
+
+
+normal_log = Output_log(Normal_out)
+trace_log = Output_log(Trace_out)
+debug_log = Output_log(Debug_out)
+device_log = Output_log(Device_out)
+
+_logs = (normal_log, trace_log, debug_log, device_log)
+
+
+def set_level(level: Union[int, str]):
+    """Set the level of all four logs."""
+    for output_log in _logs:
+        output_log.level = _as_level(level)
+
+
+if __name__ == "__main__":
+    import sys
+    import timeit
+
+    class _Stdout:
+        def write(self, text):
+            sys.stdout.write(text)
+
+        def flush(self):
+            sys.stdout.flush()
+
+    stdout = _Stdout()
+    Device_out.add_py_stream(stdout)
+
+    location = (3.5, -2.0)
+    n = 200_000
+    for label, statement in (
+        ("Device_out(f-string)", lambda: Device_out(f"target at {location}\n")),
+        ("device_log.debug(%)", lambda: device_log.debug("target at %s", location)),
+    ):
+        Device_out.remove_py_stream(stdout)  # nobody listening
+        seconds = min(timeit.repeat(statement, number=n, repeat=3))
+        Device_out.add_py_stream(stdout)
+        print(f"{label:>22}: {seconds / n * 1e9:6.0f} ns/call")
+
+    # ring buffer: the debug messages only show up because of the error
+    device_log.level = DEBUG
+    device_log.set_ring_size(3)
+    for trial in range(10):
+        device_log.debug("trial %d ok", trial)
+    device_log.error("trial %d failed", 10)
+    Device_out.remove_py_stream(stdout)
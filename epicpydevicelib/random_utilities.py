@@ -1,62 +1,173 @@
 import epiclibcpp.epiclib.random_utilities as ru
+import hashlib
 import random
+from typing import Dict, Optional, Tuple, Union
+
+import numpy as np
+from scipy.special import ndtr
 
 # NOTE: Unfortunately, the seed somehow gets set on pybind11 translation(?), the
 #       effect is that all results are now static as if a seed was specified.
 #       Instead, I'm just calling the python version when possible
-from math import log, exp
+from math import exp, log
+
+# NOTE: The *_array functions near the end of this module draw whole batches of values
+#       at once from a single numpy Generator (see get_generator()), e.g. to precompute
+#       noise for a whole trial or block instead of paying per-call overhead.
+
+# NOTE: Every function that draws random values takes an optional stream argument (a
+#       Random_stream, or the name of one in rng_registry). With stream=None, scalar
+#       functions use Python's random module and *_array functions use the module
+#       Generator, as before.
+
+_generator = np.random.default_rng()
+
+Size = Optional[Union[int, Tuple[int, ...]]]
+
+
+class Random_stream:
+    """
+    A named, independently seeded source of random values, see Random_registry.
+    generator - numpy Generator used by the *_array functions
+    random - random.Random used by the scalar functions
+    """
+
+    def __init__(self, name: str, seed_sequence: np.random.SeedSequence):
+        self.name = name
+        self.seed_sequence = seed_sequence
+        self.generator = np.random.Generator(np.random.PCG64(seed_sequence))
+        self.random = random.Random(
+            int.from_bytes(seed_sequence.generate_state(4), "little")
+        )
+
+    def __repr__(self):
+        return f"Random_stream({self.name!r})"
+
+
+class Random_registry:
+    """
+    Hands out named random streams, each derived from one master seed
+    (SeedSequence-style). A stream's seed depends only on the master seed and its
+    name, never on the order streams are requested or which process asks, so results
+    are identical no matter how work is split among worker processes. Name streams
+    after what they drive, e.g., "device", "visual_encoder", or
+    f"run/{condition}/{replication}" rather than after worker numbers.
+    """
+
+    def __init__(self, master_seed: Optional[int] = None):
+        self.streams: Dict[str, Random_stream] = dict()
+        self.master_seed = None
+        self.set_master_seed(master_seed)
+
+    def set_master_seed(self, master_seed: Optional[int] = None):
+        """Reseed from master_seed (fresh OS entropy if None), dropping every stream."""
+        if master_seed is None:
+            master_seed = np.random.SeedSequence().entropy
+        self.master_seed = master_seed
+        self.streams.clear()
+
+    @staticmethod
+    def _spawn_key(name: str) -> Tuple[int, ...]:
+        # stable across processes and runs, unlike hash()
+        digest = hashlib.sha256(name.encode("utf-8")).digest()
+        return tuple(
+            int.from_bytes(digest[i : i + 4], "little")
+            for i in range(0, len(digest), 4)
+        )
+
+    def _seed_sequence(self, name: str) -> np.random.SeedSequence:
+        return np.random.SeedSequence(self.master_seed, spawn_key=self._spawn_key(name))
+
+    def stream(self, name: str) -> Random_stream:
+        try:
+            return self.streams[name]
+        except KeyError:
+            stream = self.streams[name] = Random_stream(name, self._seed_sequence(name))
+            return stream
+
+    def seed_for(self, name: str) -> int:
+        """A 32-bit integer seed derived like stream(name), e.g., to seed epiclib"""
+        return int(self._seed_sequence(name).generate_state(1)[0])
+
+
+rng_registry = Random_registry()
+
+Stream = Optional[Union[str, Random_stream]]
+
+
+def get_stream(stream: Union[str, Random_stream]) -> Random_stream:
+    """Returns stream, looking it up by name in rng_registry if necessary"""
+    return stream if isinstance(stream, Random_stream) else rng_registry.stream(stream)
+
+
+def _random(stream: Stream):
+    return random if stream is None else get_stream(stream).random
+
+
+def _generator_for(stream: Stream) -> np.random.Generator:
+    return _generator if stream is None else get_stream(stream).generator
 
 
 def set_random_number_generator_seed(seed: int):
     """
     This might be useful for altering how EPICpy handles some things.
-    BUT, if your goal is to alter how the random functions here operate, then just use the
-    corresponding call from Python's random module.
+    It also reseeds the numpy Generator used by the *_array functions below.
+    BUT, if your goal is to alter how the scalar random functions here operate, then
+    just use the corresponding call from Python's random module.
     """
+    global _generator
+    _generator = np.random.default_rng(seed)
     return ru.set_random_number_generator_seed(seed)
 
 
+def get_generator() -> np.random.Generator:
+    """The numpy Generator behind the *_array functions"""
+    return _generator
+
+
 """ Random variable generation """
 
 
-def random_int(rand_range: int) -> int:
+def random_int(rand_range: int, stream: Stream = None) -> int:
     """Returns a random integer in the range 0 and rand_range - 1 inclusive"""
     # return ru.random_int(rand_range)
-    return random.randint(0, rand_range - 1)
+    return _random(stream).randint(0, rand_range - 1)
 
 
-def biased_coin_flip(p: float) -> bool:
+def biased_coin_flip(p: float, stream: Stream = None) -> bool:
     """Returns True with probability p"""
     # return ru.biased_coin_flip(p)
-    return random.random() >= p
+    return _random(stream).random() < p
 
 
-def unit_uniform_random_variable() -> float:
+def unit_uniform_random_variable(stream: Stream = None) -> float:
     # return ru.unit_uniform_random_variable()
-    return random.uniform(0.0, 1.0)
+    return _random(stream).uniform(0.0, 1.0)
 
 
-def uniform_random_variable(mean: float, deviation: float) -> float:
+def uniform_random_variable(
+    mean: float, deviation: float, stream: Stream = None
+) -> float:
     """return a random variable that is uniformly distributed on each side of the
     mean +/- the deviation"""
     # return ru.uniform_random_variable(mean, deviation)
-    return 2.0 * deviation * unit_uniform_random_variable() - deviation + mean
+    return 2.0 * deviation * unit_uniform_random_variable(stream) - deviation + mean
 
 
-def unit_normal_random_variable() -> float:
+def unit_normal_random_variable(stream: Stream = None) -> float:
     # return ru.unit_normal_random_variable()
-    return random.uniform(0.0, 1.0)
+    return _random(stream).gauss(0.0, 1.0)
 
 
-def normal_random_variable(mean: float, sd: float) -> float:
+def normal_random_variable(mean: float, sd: float, stream: Stream = None) -> float:
     """do not call this function if sd == 0"""
     # return ru.normal_random_variable(mean, sd)
-    return random.normalvariate(mean, sd)
+    return _random(stream).normalvariate(mean, sd)
 
 
-def exponential_random_variable(theta: float) -> float:
+def exponential_random_variable(theta: float, stream: Stream = None) -> float:
     # return ru.exponential_random_variable(theta)
-    return -theta * log(unit_uniform_random_variable())
+    return -theta * log(unit_uniform_random_variable(stream))
 
 
 # def floored_exponential_random_variable(theta: float, floor: float) -> float:
@@ -67,44 +178,46 @@ def exponential_random_variable(theta: float) -> float:
 #     return ru.gamma_random_variable(theta, n)
 
 
-def log_normal_random_variable(m: float, s: float) -> float:
+def log_normal_random_variable(m: float, s: float, stream: Stream = None) -> float:
     # return ru.log_normal_random_variable(m, s)
-    return m * exp(s * unit_normal_random_variable())
+    return m * exp(s * unit_normal_random_variable(stream))
 
 
-def uniform_detection_function(p: float) -> bool:
+def uniform_detection_function(p: float, stream: Stream = None) -> bool:
     """Returns True with a probability = p"""
     # return ru.uniform_detection_function(p)
 
-    rv: float = unit_uniform_random_variable()
+    rv: float = unit_uniform_random_variable(stream)
     return rv <= p
 
 
-def gaussian_detection_function(x: float, mean: float, sd: float) -> bool:
+def gaussian_detection_function(
+    x: float, mean: float, sd: float, stream: Stream = None
+) -> bool:
     """As x increases, the probability that True is returned increases according to
     a Normal dbn from 0. to 1.0."""
     # return ru.gaussian_detection_function(x, mean, sd)
 
     threshold: float = (x - mean) / sd  # compute z-score
-    rv: float = unit_normal_random_variable()
+    rv: float = unit_normal_random_variable(stream)
     return rv <= threshold
 
 
 def lapsed_gaussian_detection_function(
-    x: float, mean: float, sd: float, lapse_probability: float
+    x: float, mean: float, sd: float, lapse_probability: float, stream: Stream = None
 ) -> bool:
     """
     With lapse_probability, return False else return the gaussian_detection_function
     result.
     """
     # return ru.lapsed_gaussian_detection_function(x, mean, sd, lapse_probability)
-    if biased_coin_flip(lapse_probability):
+    if biased_coin_flip(lapse_probability, stream):
         return False
-    return gaussian_detection_function(x, mean, sd)
+    return gaussian_detection_function(x, mean, sd, stream)
 
 
 def based_gaussian_detection_function(
-    x: float, base: float, mean: float, sd: float
+    x: float, base: float, mean: float, sd: float, stream: Stream = None
 ) -> bool:
     """
     As x increases, the probability that True is returned increases according to a
@@ -112,26 +225,28 @@ def based_gaussian_detection_function(
     """
     # return ru.based_gaussian_detection_function(x, base, mean, sd)
 
-    rv: float = unit_uniform_random_variable()
+    rv: float = unit_uniform_random_variable(stream)
     if rv <= base:
         return True
-    return gaussian_detection_function(x, mean, sd)
+    return gaussian_detection_function(x, mean, sd, stream)
 
 
 def capped_gaussian_detection_function(
-    x: float, cap: float, mean: float, sd: float
+    x: float, cap: float, mean: float, sd: float, stream: Stream = None
 ) -> bool:
     """As x increases, the probability that True is returned increases according to a
     Normal dbn from 0 to cap."""
     # return ru.capped_gaussian_detection_function(x, cap, mean, sd)
 
-    rv: float = unit_uniform_random_variable()
+    rv: float = unit_uniform_random_variable(stream)
     if rv <= 1.0 - cap:
         return False
-    return gaussian_detection_function(x, mean, sd)
+    return gaussian_detection_function(x, mean, sd, stream)
 
 
-def exponential_detection_function(x: float, _lambda: float) -> bool:
+def exponential_detection_function(
+    x: float, _lambda: float, stream: Stream = None
+) -> bool:
     """
     As x increases, the probability that True is returned increases according to an
     exponential dbn from 0 to 1.0 the lambda parameter is assumed to be the
@@ -141,19 +256,21 @@ def exponential_detection_function(x: float, _lambda: float) -> bool:
     """
     # return ru.exponential_detection_function(x, _lambda)
 
-    rv: float = -log(unit_uniform_random_variable()) / _lambda
+    rv: float = -log(unit_uniform_random_variable(stream)) / _lambda
     return rv <= x
 
 
-def based_exponential_detection_function(x: float, base: float, _lambda: float) -> bool:
+def based_exponential_detection_function(
+    x: float, base: float, _lambda: float, stream: Stream = None
+) -> bool:
     """As x increases, the probability that True is returned increases according to a
     exponential dbn from base to 1.0."""
     # return ru.based_exponential_detection_function(x, base, _lambda)
 
-    rv: float = unit_uniform_random_variable()
+    rv: float = unit_uniform_random_variable(stream)
     if rv <= base:
         return True
-    return exponential_detection_function(x, _lambda)
+    return exponential_detection_function(x, _lambda, stream)
 
 
 def get_bivariate_normal_cdf(z1: float, z2: float) -> float:
@@ -165,6 +282,200 @@ def get_bivariate_normal_cdf(z1: float, z2: float) -> float:
     return ru.get_bivariate_normal_cdf(z1, z2)
 
 
+# EPIC's table behind get_bivariate_normal_cdf(): P(Z1 <= z1, Z2 <= z2) for independent
+# z-scores from -3 to +3 in steps of 0.25, to 6 decimal places
+_BIVARIATE_Z_STEP = 0.25
+_BIVARIATE_Z_LIMIT = 3.0
+_bivariate_z = np.arange(-12, 13) * _BIVARIATE_Z_STEP
+_bivariate_normal_cdf_table = np.round(
+    ndtr(_bivariate_z)[:, None] * ndtr(_bivariate_z)[None, :], 6
+)
+
+
+""" Batch (array) random variable generation """
+
+# These follow the definitions documented above (and used by EPIC's C++ versions),
+# e.g. unit_normal_random_array() is standard normal and biased_coin_flip_array(p)
+# is True with probability p.
+
+# The *_detection_array functions take arrays (or scalars) for x and every parameter,
+# broadcast together, and return a boolean mask, e.g. availability of every object at
+# its eccentricity in one call. With probability_only=True they skip sampling and
+# return the underlying probability of True instead (deterministic, e.g. for expected
+# values).
+
+
+def get_bivariate_normal_cdf_array(z1, z2) -> np.ndarray:
+    """
+    get_bivariate_normal_cdf() for arrays of z-scores (broadcast), the same values:
+    like EPIC, z-scores are clamped to [-3, 3] and rounded down to a multiple of 0.25.
+    (For the exact, unrounded cdf use ndtr(z1) * ndtr(z2).)
+    """
+
+    def index(z):
+        z = np.clip(np.asarray(z, dtype=float), -_BIVARIATE_Z_LIMIT, _BIVARIATE_Z_LIMIT)
+        return np.floor((z + _BIVARIATE_Z_LIMIT) / _BIVARIATE_Z_STEP).astype(np.intp)
+
+    return _bivariate_normal_cdf_table[index(z1), index(z2)]
+
+
+def random_int_array(
+    rand_range: int, size: Size = None, stream: Stream = None
+) -> np.ndarray:
+    """random integers in the range 0 and rand_range - 1 inclusive"""
+    return _generator_for(stream).integers(0, rand_range, size=size)
+
+
+def biased_coin_flip_array(p, size: Size = None, stream: Stream = None) -> np.ndarray:
+    """True with probability p"""
+    generator = _generator_for(stream)
+    return generator.random(size if size is not None else np.shape(p)) < p
+
+
+def unit_uniform_random_array(size: Size = None, stream: Stream = None) -> np.ndarray:
+    return _generator_for(stream).random(size)
+
+
+def uniform_random_array(
+    mean, deviation, size: Size = None, stream: Stream = None
+) -> np.ndarray:
+    """uniformly distributed on each side of the mean +/- the deviation"""
+    return _generator_for(stream).uniform(
+        np.subtract(mean, deviation), np.add(mean, deviation), size
+    )
+
+
+def unit_normal_random_array(size: Size = None, stream: Stream = None) -> np.ndarray:
+    return _generator_for(stream).standard_normal(size)
+
+
+def normal_random_array(
+    mean, sd, size: Size = None, stream: Stream = None
+) -> np.ndarray:
+    return _generator_for(stream).normal(mean, sd, size)
+
+
+def exponential_random_array(
+    theta, size: Size = None, stream: Stream = None
+) -> np.ndarray:
+    return _generator_for(stream).exponential(theta, size)
+
+
+def log_normal_random_array(
+    m, s, size: Size = None, stream: Stream = None
+) -> np.ndarray:
+    return np.multiply(
+        m, np.exp(np.multiply(s, _generator_for(stream).standard_normal(size)))
+    )
+
+
+def _detect(p, size: Size, stream: Stream, probability_only: bool) -> np.ndarray:
+    """True with probability p (broadcast to size), or p itself if probability_only"""
+    p = np.asarray(p, dtype=float)
+    if probability_only:
+        return p if size is None else np.broadcast_to(p, size)
+    generator = _generator_for(stream)
+    return generator.random(size if size is not None else p.shape) < p
+
+
+def _gaussian_p(x, mean, sd) -> np.ndarray:
+    return ndtr((np.asarray(x, dtype=float) - mean) / sd)
+
+
+def _exponential_p(x, _lambda) -> np.ndarray:
+    x = np.asarray(x, dtype=float)
+    return np.where(x > 0.0, -np.expm1(-np.asarray(_lambda) * np.maximum(x, 0.0)), 0.0)
+
+
+def uniform_detection_array(
+    p, size: Size = None, stream: Stream = None, probability_only: bool = False
+) -> np.ndarray:
+    """True with a probability = p"""
+    return _detect(p, size, stream, probability_only)
+
+
+def gaussian_detection_array(
+    x,
+    mean,
+    sd,
+    size: Size = None,
+    stream: Stream = None,
+    probability_only: bool = False,
+) -> np.ndarray:
+    """As x increases, p(True) increases according to a Normal dbn from 0. to 1.0."""
+    return _detect(_gaussian_p(x, mean, sd), size, stream, probability_only)
+
+
+def lapsed_gaussian_detection_array(
+    x,
+    mean,
+    sd,
+    lapse_probability,
+    size: Size = None,
+    stream: Stream = None,
+    probability_only: bool = False,
+) -> np.ndarray:
+    """With lapse_probability, False, else gaussian_detection_array() result."""
+    p = (1.0 - np.asarray(lapse_probability)) * _gaussian_p(x, mean, sd)
+    return _detect(p, size, stream, probability_only)
+
+
+def based_gaussian_detection_array(
+    x,
+    base,
+    mean,
+    sd,
+    size: Size = None,
+    stream: Stream = None,
+    probability_only: bool = False,
+) -> np.ndarray:
+    """As x increases, p(True) increases according to a Normal dbn from base to 1.0."""
+    p = base + (1.0 - np.asarray(base)) * _gaussian_p(x, mean, sd)
+    return _detect(p, size, stream, probability_only)
+
+
+def capped_gaussian_detection_array(
+    x,
+    cap,
+    mean,
+    sd,
+    size: Size = None,
+    stream: Stream = None,
+    probability_only: bool = False,
+) -> np.ndarray:
+    """As x increases, p(True) increases according to a Normal dbn from 0 to cap."""
+    p = np.asarray(cap) * _gaussian_p(x, mean, sd)
+    return _detect(p, size, stream, probability_only)
+
+
+def exponential_detection_array(
+    x,
+    _lambda,
+    size: Size = None,
+    stream: Stream = None,
+    probability_only: bool = False,
+) -> np.ndarray:
+    """
+    As x increases, p(True) increases according to an exponential dbn from 0 to 1.0,
+    see exponential_detection_function()
+    """
+    return _detect(_exponential_p(x, _lambda), size, stream, probability_only)
+
+
+def based_exponential_detection_array(
+    x,
+    base,
+    _lambda,
+    size: Size = None,
+    stream: Stream = None,
+    probability_only: bool = False,
+) -> np.ndarray:
+    """As x increases, p(True) increases according to a exponential dbn from base to
+    1.0."""
+    p = base + (1.0 - np.asarray(base)) * _exponential_p(x, _lambda)
+    return _detect(p, size, stream, probability_only)
+
+
 if __name__ == "__main__":
     print(f"{unit_normal_random_variable()}")
     print(f"{biased_coin_flip(0.6)}")
@@ -174,3 +485,20 @@ if __name__ == "__main__":
     # e.g. (-3, +3) returns 0.001348 (+3, +3) returns 0.997302.
     print(f"{get_bivariate_normal_cdf(-3, 3)=}")
     print(f"{get_bivariate_normal_cdf(3, 3)=}")
+    print(f"{get_bivariate_normal_cdf_array([-3, 1, 2], [3, 2, 1])=}")
+
+    set_random_number_generator_seed(42)
+    print(f"{normal_random_array(500, 50, 5)=}")
+    print(f"{gaussian_detection_array([-1.0, 0.0, 1.0], 0.0, 1.0, (3, 3))=}")
+    eccentricity = np.array([0.5, 2.0, 7.5, 15.0])
+    availability = capped_gaussian_detection_array(
+        eccentricity, 0.9, 5.0, 2.0, probability_only=True
+    )
+    print(f"{availability=}")
+
+    # named streams are reproducible from the master seed alone
+    rng_registry.set_master_seed(2024)
+    first = normal_random_array(0, 1, 3, stream="run/Easy/1")
+    rng_registry.set_master_seed(2024)
+    assert (normal_random_array(0, 1, 3, stream="run/Easy/1") == first).all()
+    print(f"{first=}, {random_int(11, stream='run/Easy/1')=}")
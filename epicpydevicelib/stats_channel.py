@@ -0,0 +1,370 @@
+"""
+StatsChannel sits between EpicPyDevice.stats_write() and the "stats_write" event on
+the device bus. The Stats Output window re-renders its contents on every event, so
+rather than emitting each write as it happens, the channel holds written html and
+emits it as a single event once max_writes writes are pending or a write comes
+max_interval seconds or more after the last emit, whichever comes first. Output is
+only ever emitted from write(), flush() and close(), i.e., on the device's own thread
+and never with the channel's lock held, so listeners may write to the channel again.
+Output written just before the device goes quiet waits for the next write, or for the
+flush at the end of the run.
+A figure identical to the one written just before it is dropped instead of being sent
+(and displayed) again. Only back-to-back repeats are dropped: figures A, B, A are all
+sent, though the second A reuses the rendering of the first (see below).
+
+Figures are handed to a FigureRenderer, which turns them into html either on the
+calling thread or on a pool of worker threads, so that a device writing many figures
+(e.g., an end-of-run report over many conditions) is not held up by savefig(). What
+the workers render is a pickled snapshot of the figure taken at the time of the write,
+so the device is free to change or reuse the figure right away. The snapshot also
+serves as the figure's content hash: a figure written again unchanged reuses the
+earlier rendering. A figure that can't be pickled (e.g., one with a FuncFormatter
+wrapping a closure) is rendered on the calling thread instead, as are all figures when
+there are no workers; those are hashed by their png. Output is still emitted in the
+order it was written; anything written after a figure waits for that figure to be
+rendered.
+
+Images can also be saved as png files in an image folder, with the html referring to
+the file rather than carrying the whole image as a base64 data URI.
+
+Devices opt in by setting self.stats_coalesce = True, self.stats_figure_workers to a
+number of threads, or self.stats_image_folder (see EpicPyDevice.__init__). The
+channel is closed by EpicPyDevice.handle_Stop_event() and finalize_data_output(),
+waiting for any figures still being rendered, so nothing written during a run is
+lost. Call device.flush_stats_output() to force pending output out sooner.
+"""
+
+import base64
+import copyreg
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import Callable, List, Optional, Tuple, Union
+
+from matplotlib.cbook import CallbackRegistry
+from matplotlib.figure import Figure
+
+
+def figure_to_png(figure: Figure) -> bytes:
+    buffer = BytesIO()
+    figure.savefig(buffer, format="png")
+    return buffer.getvalue()
+
+
+def png_to_html(png: bytes) -> str:
+    # https://stackoverflow.com/questions/48717794
+    encoded = base64.b64encode(png).decode("utf-8")
+    return f"<img src='data:image/png;base64,{encoded}'>"
+
+
+def _new_object(cls):
+    return cls.__new__(cls)
+
+
+def _reduce_figure(figure: Figure):
+    # like Figure.__reduce__, but never re-register the copy with pyplot, which would
+    # create a gui window (on whatever thread unpickles it)
+    state = figure.__getstate__()
+    state.pop("_restore_to_pylab", None)
+    return _new_object, (type(figure),), state
+
+
+def _reduce_callback_registry(registry: CallbackRegistry):
+    # callbacks aren't pickled anyway; leaving out the cid counter makes snapshots of
+    # an unchanged figure identical
+    return CallbackRegistry, (registry.exception_handler,)
+
+
+class _Snapshot_pickler(pickle.Pickler):
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[Figure] = _reduce_figure
+    dispatch_table[CallbackRegistry] = _reduce_callback_registry
+
+
+def figure_snapshot(figure: Figure) -> bytes:
+    buffer = BytesIO()
+    _Snapshot_pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(figure)
+    return buffer.getvalue()
+
+
+def _png_html(png: bytes, image_path: Optional[str] = None) -> str:
+    if image_path is None:
+        return png_to_html(png)
+    image_path = Path(image_path)
+    image_path.write_bytes(png)
+    return f"<img src='{image_path.resolve().as_uri()}'>"
+
+
+def render_snapshot(snapshot: bytes, image_path: Optional[str] = None) -> str:
+    """Render a figure_snapshot() to html, as a data URI or a reference to image_path"""
+    return _png_html(figure_to_png(pickle.loads(snapshot)), image_path)
+
+
+class FigureRenderer:
+    """
+    Turns figures into html for the stats window, caching results by content.
+    workers - number of rendering threads; 0 renders on the calling thread
+    executor - use this (e.g., a ProcessPoolExecutor) instead of a thread pool
+    image_folder - if given, save pngs here and refer to them instead of inlining them
+    cache_size - number of renderings (futures) remembered for re-written figures
+    render() - returns (content digest, Future of the html)
+    shutdown() - shut down the thread pool, which render() starts again if needed
+                 (an executor passed in is left alone)
+    """
+
+    def __init__(
+        self,
+        workers: int = 0,
+        executor: Optional[Executor] = None,
+        image_folder: Optional[Union[str, Path]] = None,
+        cache_size: int = 128,
+    ):
+        self.workers = workers
+        self._own_executor = executor is None and workers > 0
+        self.executor = executor
+        self.image_folder = Path(image_folder) if image_folder is not None else None
+        if self.image_folder is not None:
+            self.image_folder.mkdir(parents=True, exist_ok=True)
+        self.cache_size = max(1, cache_size)
+        self.cache: "OrderedDict[str, Future]" = OrderedDict()
+
+        self.renders = 0
+        self.cache_hits = 0
+
+    def _get_executor(self) -> Optional[Executor]:
+        if self.executor is None and self._own_executor:
+            self.executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="figure_render"
+            )
+        return self.executor
+
+    def _image_path(self, digest: str) -> Optional[str]:
+        if self.image_folder is None:
+            return None
+        return str(Path(self.image_folder, f"figure_{digest}.png"))
+
+    def _cached(self, digest: str) -> Optional[Future]:
+        future = self.cache.get(digest)
+        if future is not None:
+            self.cache.move_to_end(digest)
+            self.cache_hits += 1
+        return future
+
+    def render(self, figure: Figure) -> Tuple[str, Future]:
+        executor = self._get_executor()
+        snapshot = None
+        if executor is not None:
+            try:
+                snapshot = figure_snapshot(figure)
+            except Exception:
+                snapshot = None  # render it here and now instead
+
+        if snapshot is not None:
+            digest = hashlib.blake2b(snapshot, digest_size=16).hexdigest()
+            future = self._cached(digest)
+            if future is not None:
+                return digest, future
+            future = executor.submit(
+                render_snapshot, snapshot, self._image_path(digest)
+            )
+        else:
+            future = Future()
+            try:
+                png = figure_to_png(figure)
+            except Exception as e:
+                future.set_exception(e)
+                return f"error:{id(future)}", future
+            digest = hashlib.blake2b(png, digest_size=16).hexdigest()
+            cached = self._cached(digest)
+            if cached is not None:
+                return digest, cached
+            try:
+                future.set_result(_png_html(png, self._image_path(digest)))
+            except Exception as e:
+                future.set_exception(e)
+        self.renders += 1
+
+        self.cache[digest] = future
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return digest, future
+
+    def shutdown(self, wait: bool = True):
+        if self._own_executor and self.executor is not None:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
+
+
+class StatsChannel:
+    """
+    write() - queue html for the stats window, emitting the queue if it is due
+    write_figure() - queue a figure, unless it is identical to the one written just
+                     before it
+    flush() - emit anything queued as one event (with wait=False, only what precedes
+              the first figure still being rendered)
+    close() - flush, and shut down the renderer's thread pool; writing again later
+              starts it again
+    metrics() - counts of writes, emits and dropped duplicate figures
+    """
+
+    def __init__(
+        self,
+        emit: Callable[[str], object],
+        max_writes: int = 50,
+        max_interval: float = 0.25,
+        separator: str = "<br>",
+        clock: Callable[[], float] = time.monotonic,
+        renderer: Optional[FigureRenderer] = None,
+    ):
+        self.emit = emit
+        self.max_writes = max(1, max_writes)
+        self.max_interval = max_interval
+        self.separator = separator
+        self.clock = clock
+        self.renderer = renderer if renderer is not None else FigureRenderer()
+
+        self.pending: List[Union[str, Future]] = []
+        self.last_emit_time = clock()
+        self.last_figure_digest: Optional[str] = None
+        self._lock = threading.RLock()
+        # flushed output waiting to be emitted, in order, by whoever is emitting
+        self._outbox: "deque[List[Union[str, Future]]]" = deque()
+        self._emitting = False
+
+        self.writes = 0
+        self.emits = 0
+        self.duplicate_figures = 0
+
+    def write(self, html: Union[str, Future]):
+        with self._lock:
+            self.pending.append(html)
+            self.writes += 1
+            due = (
+                len(self.pending) >= self.max_writes
+                or self.clock() - self.last_emit_time >= self.max_interval
+            )
+        if due:
+            self.flush(wait=False)
+
+    def write_figure(self, figure: Figure) -> bool:
+        """Returns False if the figure was dropped as a duplicate."""
+        digest, html = self.renderer.render(figure)
+        with self._lock:
+            if digest == self.last_figure_digest:
+                self.duplicate_figures += 1
+                return False
+            self.last_figure_digest = digest
+        self.write(html)
+        return True
+
+    @staticmethod
+    def _html(item: Union[str, Future]) -> str:
+        if not isinstance(item, Future):
+            return item
+        try:
+            return item.result()
+        except Exception as e:
+            return f"ERROR: stats_channel: unable to render figure: {e}"
+
+    def flush(self, wait: bool = True):
+        with self._lock:
+            self.last_emit_time = self.clock()
+            ready = len(self.pending)
+            if not wait:
+                for i, item in enumerate(self.pending):
+                    if isinstance(item, Future) and not item.done():
+                        ready = i
+                        break
+            if not ready:
+                return
+            self._outbox.append(self.pending[:ready])
+            del self.pending[:ready]
+            if self._emitting:
+                return  # sent, after what came before it, by the emit in progress
+            self._emitting = True
+        self._send_outbox()
+
+    def _send_outbox(self):
+        # emit without holding the lock, so a listener that writes (or flushes) again
+        # just queues its output behind what is being sent
+        try:
+            while True:
+                with self._lock:
+                    if not self._outbox:
+                        self._emitting = False
+                        return
+                    items = self._outbox.popleft()
+                    self.emits += 1
+                self.emit(self.separator.join(self._html(item) for item in items))
+        except BaseException:
+            with self._lock:
+                self._emitting = False
+            raise
+
+    def close(self):
+        self.flush()
+        self.renderer.shutdown()
+
+    def reset(self):
+        """Forget pending output and the last figure, e.g., when a new run starts."""
+        with self._lock:
+            self.pending = []
+            self._outbox.clear()
+            self.last_figure_digest = None
+            self.last_emit_time = self.clock()
+
+    def metrics(self) -> Tuple[int, int, int]:
+        """(writes, emits, duplicate_figures)"""
+        return self.writes, self.emits, self.duplicate_figures
+
+
+if __name__ == "__main__":
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    import numpy as np
+
+    emitted = []
+    channel = StatsChannel(emitted.append, max_writes=10, max_interval=60.0)
+    for trial in range(25):
+        channel.write(f"Trial {trial} done")
+    fig, ax = plt.subplots()
+    ax.plot([1, 2, 3], [2, 1, 3])
+    print("first figure sent:", channel.write_figure(fig))
+    print("same figure sent:", channel.write_figure(fig))
+    channel.close()
+    print("writes, emits, duplicate figures:", channel.metrics())
+    print("emitted events:", len(emitted))
+
+    # held until a write comes max_interval after the last emit
+    channel = StatsChannel(emitted.append, max_writes=10, max_interval=0.1)
+    channel.write("Trial 1 done")
+    time.sleep(0.2)
+    channel.write("Trial 2 done")
+    print("emitted after max_interval:", emitted[-1])
+
+    # end-of-run report: one figure per condition, rendered inline vs on 4 threads
+    x = np.linspace(0, 10, 2000)
+    for workers in (0, 4):
+        renderer = FigureRenderer(workers=workers)
+        channel = StatsChannel(lambda html: None, max_writes=1000, renderer=renderer)
+        start = time.perf_counter()
+        for condition in range(20):
+            ax.clear()
+            for i in range(5):
+                ax.plot(x, np.sin(x * (condition + 1) + i))
+            ax.set_title(f"Condition {condition}")
+            channel.write_figure(fig)
+        written = time.perf_counter() - start
+        channel.close()
+        print(
+            f"workers={workers}: {written:.2f} sec in stats_write, "
+            f"{time.perf_counter() - start:.2f} sec until all figures were emitted"
+        )
@@ -0,0 +1,288 @@
+"""
+Sweep_runner runs an EPIC simulation for every permutation of a condition pattern
+(see unpack_param_string), times a number of replications, spread over a pool of
+worker processes with no GUI involved:
+
+    runner = Sweep_runner(
+        EpicDevice,
+        "10 [Easy|Hard] [Dash|HUD]",
+        rule_file="rules/choice_task.prs",
+        output="sweep_data.csv",
+        replications=20,
+    )
+    merged_file = runner.run()
+
+Each worker process builds one device and compiles the rules once (a Headless_runner,
+see headless.py), then runs the tasks it is given one after another. Every task writes
+its data to a file of its own under a temporary folder, and the files are merged, in
+task order, into output as the tasks finish (each file is deleted once merged). Only a
+few tasks per worker are submitted ahead of the merge, so memory and disk use don't
+grow with the sweep.
+
+Which tasks share a device depends on the number of workers, so the merged data only
+stays the same for any number of workers if the device sets up all of its run state
+in handle_Start_event() (see EpicPyDevice.handle_Start_event). For a device that keeps
+state from one run to the next (e.g., a trial counter set in __init__), pass
+rebuild_device=True to build and compile a new one for every task instead, which is
+slower.
+
+Each task is seeded (epiclib, Python's random module, and random_utilities'
+rng_registry) from the sweep seed and its condition and replication only, so a sweep
+can be re-run exactly by passing the same seed.
+"""
+
+import inspect
+import itertools
+import os
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple, Type, Union
+
+from epicpydevicelib.epicpy_device_base import (
+    EpicPyDevice,
+    ParamPermutations,
+    unpack_param_string,
+)
+from epicpydevicelib import random_utilities
+from epicpydevicelib.data_sinks import DataSink
+from epicpydevicelib.headless import Headless_runner
+from epicpydevicelib.output_log import device_log
+
+
+class Sweep_task(NamedTuple):
+    index: int
+    condition: str
+    replication: int
+    seed: int
+
+
+class _Sweep_config(NamedTuple):
+    device_class: Callable[..., EpicPyDevice]
+    device_name: str
+    device_folder: Path
+    rule_file: Path
+    work_folder: Path
+    max_time: Optional[int]
+    time_step: int
+    rebuild_device: bool
+
+
+_runner: Optional[Headless_runner] = None
+
+
+def _run_task(config: _Sweep_config, task: Sweep_task) -> dict:
+    global _runner
+    start = time.perf_counter()
+    result = dict(task._asdict(), data_file="", data_sink=None, sim_time=0, error="")
+    try:
+        if _runner is not None and config.rebuild_device:
+            _runner.close()
+            _runner = None
+        if _runner is None:
+            _runner = Headless_runner(
+                config.device_class,
+                config.rule_file,
+                time_step=config.time_step,
+                device_name=config.device_name,
+                device_folder=config.device_folder,
+            )
+            _runner.keep_results = False
+        device = _runner.device
+
+        # the data format is the device's choice: its data_sink and file suffix
+        device.finalize_data_output()
+        suffix = Path(device.data_filepath).suffix
+        data_file = Path(config.work_folder, f"task_{task.index:07d}{suffix}")
+        result["data_file"] = str(data_file)
+        result["data_sink"] = device.data_sink
+        device.data_filepath = data_file
+        device.data_filemode = "w"
+        device.init_data_output()
+
+        run = _runner.run(task.condition, task.seed, config.max_time)
+        result["sim_time"] = run.sim_time
+        device.finalize_data_output()
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["wall_time"] = time.perf_counter() - start
+    return result
+
+
+def _run_tasks(config: _Sweep_config, tasks: List[Sweep_task]) -> List[dict]:
+    return [_run_task(config, task) for task in tasks]
+
+
+class Sweep_runner:
+    """
+    Runs device_class for each permutation of condition_pattern, replications times.
+    device_class - called as device_class(Device_out, device_name, device_folder) in
+                   each worker; for devices constructed differently, pass a
+                   module-level function that builds the device instead
+    output - merged data file; its format is that of the device's data_sink
+    workers - number of worker processes (default: os.cpu_count())
+    seed - sweep seed (default: fresh entropy), see self.seed
+    max_time - stop a run that has not shut down after this much simulated time (ms)
+    rebuild_device - build (and compile the rules for) a new device for every task,
+                     rather than one per worker, for devices that don't fully reset
+                     in handle_Start_event()
+    run() - run all tasks, returns the merged data file (None if no task wrote
+            any data). Per-task results (seed, data sink, simulated and wall time,
+            any error) are left in self.results, unless keep_results is set to
+            False; the number of failed tasks is left in self.failed
+    """
+
+    def __init__(
+        self,
+        device_class: Callable[..., EpicPyDevice],
+        condition_pattern: str,
+        rule_file: Union[str, Path],
+        output: Union[str, Path],
+        replications: int = 1,
+        workers: Optional[int] = None,
+        seed: Optional[int] = None,
+        device_name: Optional[str] = None,
+        device_folder: Optional[Union[str, Path]] = None,
+        max_time: Optional[int] = None,
+        time_step: int = 1000,
+        keep_task_files: bool = False,
+        mp_context=None,
+        rebuild_device: bool = False,
+    ):
+        self.device_class = device_class
+        self.condition_pattern = condition_pattern
+        self.rule_file = Path(rule_file).resolve()
+        self.output = Path(output)
+        self.replications = replications
+        self.workers = workers or os.cpu_count() or 1
+        self.seed = (
+            seed if seed is not None else random_utilities.Random_registry().master_seed
+        )
+        self.device_name = device_name or getattr(device_class, "__name__", "Device")
+        self.device_folder = Path(
+            device_folder or Path(inspect.getfile(device_class)).parent
+        )
+        self.max_time = max_time
+        self.time_step = time_step
+        self.keep_task_files = keep_task_files
+        self.mp_context = mp_context
+        self.rebuild_device = rebuild_device
+        self.results: List[dict] = []
+        self.keep_results = True
+        self.failed = 0
+
+    def conditions(self) -> ParamPermutations:
+        return unpack_param_string(self.condition_pattern)
+
+    def __len__(self) -> int:
+        return len(self.conditions()) * self.replications
+
+    def tasks(self) -> Iterator[Sweep_task]:
+        registry = random_utilities.Random_registry(self.seed)
+        index = 0
+        for condition in self.conditions():
+            for replication in range(self.replications):
+                seed = registry.seed_for(f"sweep/{condition}/{replication}")
+                yield Sweep_task(index, condition, replication, seed)
+                index += 1
+
+    def run(self) -> Optional[Path]:
+        self.output.parent.mkdir(parents=True, exist_ok=True)
+        work_folder = Path(tempfile.mkdtemp(prefix=".sweep_", dir=self.output.parent))
+        config = _Sweep_config(
+            self.device_class,
+            self.device_name,
+            self.device_folder,
+            self.rule_file,
+            work_folder,
+            self.max_time,
+            self.time_step,
+            self.rebuild_device,
+        )
+
+        n_tasks = len(self)
+        chunksize = max(1, min(n_tasks // (self.workers * 4), 64))
+        self.results = []
+        self.failed = 0
+        merged = None
+        start = time.perf_counter()
+        try:
+            with ProcessPoolExecutor(self.workers, mp_context=self.mp_context) as pool:
+                data_files = self._data_files(
+                    self._results(pool, config, chunksize), work_folder
+                )
+                # the first data file decides the format (and whether there is any)
+                first = next(data_files, None)
+                if first is not None:
+                    data_file, data_sink = first
+                    data_sink.merge_files(
+                        itertools.chain(
+                            [data_file], (data_file for data_file, _ in data_files)
+                        ),
+                        self.output,
+                    )
+                    merged = self.output
+        finally:
+            if not self.keep_task_files:
+                shutil.rmtree(work_folder, ignore_errors=True)
+
+        elapsed = time.perf_counter() - start
+        device_log.info(
+            "Sweep of %d runs finished in %.1f sec (%.1f runs/sec), %d failed, "
+            "data in %s",
+            n_tasks,
+            elapsed,
+            n_tasks / elapsed if elapsed else 0.0,
+            self.failed,
+            merged if merged is not None else "(no data files)",
+        )
+        return merged
+
+    def _results(
+        self, pool: ProcessPoolExecutor, config: _Sweep_config, chunksize: int
+    ) -> Iterator[dict]:
+        """
+        Task results, in task order, as they come in. Tasks are submitted chunksize at
+        a time, with at most max_chunks chunks submitted but not yet consumed, so
+        neither tasks nor results pile up in memory (or task files on disk), however
+        large the sweep.
+        """
+        max_chunks = self.workers * 4
+        tasks = self.tasks()
+        futures = deque()
+        while True:
+            while len(futures) < max_chunks:
+                chunk = list(itertools.islice(tasks, chunksize))
+                if not chunk:
+                    break
+                futures.append(pool.submit(_run_tasks, config, chunk))
+            if not futures:
+                return
+            yield from futures.popleft().result()
+
+    def _data_files(
+        self, results: Iterator[dict], work_folder: Path
+    ) -> Iterator[Tuple[str, Type[DataSink]]]:
+        """(data file, data sink) of each task that wrote data, logging failed tasks"""
+        for result in results:
+            if self.keep_results:
+                self.results.append(result)
+            if result["error"]:
+                self.failed += 1
+                device_log.warning(
+                    "WARNING: sweep task %d (%r, replication %d) failed: %s",
+                    result["index"],
+                    result["condition"],
+                    result["replication"],
+                    result["error"],
+                )
+                continue
+            data_file = Path(result["data_file"])
+            if data_file.is_file():
+                yield result["data_file"], result["data_sink"]
+                # merged by now
+                if not self.keep_task_files:
+                    data_file.unlink(missing_ok=True)
@@ -1,4 +1,5 @@
-from typing import List, Union
+from collections import OrderedDict
+from typing import List, Optional, Union
 from multimethod import multimethod
 
 from epiclibcpp.epiclib import Symbol as _Symbol, geometric_utilities as gu
@@ -68,6 +69,8 @@ class Symbol:
     def __init__(self, src: _Symbol): ...
 
     def __new__(cls, *args, **kwargs):
+        if len(args) == 1 and type(args[0]) in (str, int, float):
+            return symbol_cache(args[0])
         return _Symbol(*args)  # , **kwargs)
 
     def swap(self, other: _Symbol):
@@ -123,6 +126,75 @@ class Symbol:
         ...
 
 
+class SymbolCache:
+    """
+    Python-side intern table for Symbols built from strings and numbers.
+    Creating a Symbol requires a lookup for a previously stored matching value on the
+    C++ side, which is slow compared to a dict lookup, so each distinct raw value is
+    only converted once. Calling the cache with a value returns the same Symbol object
+    for the same value every time (until evicted).
+
+    maxsize - if not None, keep at most this many Symbols, evicting the least
+              recently used one first.
+    stats() - hits, misses, and current size of the table
+
+    Note: Symbol.swap() modifies a Symbol in place; never swap an interned Symbol.
+    """
+
+    def __init__(self, maxsize: Optional[int] = None):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._symbols = OrderedDict()
+
+    def __call__(self, value: Union[str, int, float]) -> _Symbol:
+        # strings are their own key, other values are keyed with their type so that
+        # 1, 1.0 and True (which compare equal) don't share an entry.
+        key = value if type(value) is str else (type(value), value)
+        try:
+            symbol = self._symbols[key]
+        except KeyError:
+            self.misses += 1
+            symbol = self._symbols[key] = _Symbol(value)
+            if self.maxsize is not None and len(self._symbols) > self.maxsize:
+                self._symbols.popitem(last=False)
+            return symbol
+        self.hits += 1
+        if self.maxsize is not None:
+            self._symbols.move_to_end(key)
+        return symbol
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def set_maxsize(self, maxsize: Optional[int]):
+        self.maxsize = maxsize
+        if maxsize is not None:
+            while len(self._symbols) > maxsize:
+                self._symbols.popitem(last=False)
+
+    def clear(self):
+        self._symbols.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self._symbols),
+            "maxsize": self.maxsize,
+        }
+
+
+# shared by every wrapper in epicpydevicelib that builds Symbols from str/int/float.
+# Bounded, since devices may intern values without limit (e.g., per-trial numbers or
+# generated object names); use symbol_cache.set_maxsize() to change the bound.
+symbol_cache = SymbolCache(maxsize=4096)
+
+
 if __name__ == "__main__":
     sym1 = Symbol("sym1")
     sym2 = Symbol("32.3", True)
@@ -135,3 +207,5 @@ if __name__ == "__main__":
     print(f"{sym3.get_point()=}")
     p = gu.Point(402, 1123)
     print(f"{p=}")
+    print(f"{Symbol('sym1') is Symbol('sym1')=}")
+    print(f"{symbol_cache.stats()=}")
@@ -9,6 +9,8 @@ from epiclibcpp.epiclib import (
     geometric_utilities as gu,
 )
 
+from epicpydevicelib.symbol import symbol_cache
+
 
 # Return the Symbol that is nth in the list, starting with 0
 # if not found, or not legal n, an empty Symbol is returned
@@ -33,7 +35,7 @@ def cstr_to_Symbol_list(text: str) -> List[Symbol]:
     return a list of Symbols, where each symbol is the whitespace delimited sequence
     in the input C-string.  e.g. "A B CD E" => (A B CD E)
     """
-    return [Symbol(item) for item in text.split(" ")]
+    return [symbol_cache(item) for item in text.split(" ")]
 
 
 def int_to_Symbol(i: int) -> Symbol:
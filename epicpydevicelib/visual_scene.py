@@ -0,0 +1,132 @@
+"""
+VisualScene is a retained-mode model of a device's visual display. Instead of
+re-sending every object and property each trial, describe the whole frame and let
+render() work out what changed since the previous frame. Only those changes are sent
+to the device (and on to the simulated human's perceptual processors):
+
+    self.scene = VisualScene(self)
+    ...
+    self.scene.render({
+        "Target": {"location": (x, y), "size": (1, 1), "properties": {"Color": "Red"}},
+        "Fixation": {"location": (0, 0), "size": (0.5, 0.5)},
+    })
+
+Frames use the same format as EpicPyDevice.make_visual_objects_appear(). Objects
+missing from a frame are made to disappear; properties missing from a frame are set
+to Nil.
+"""
+
+from typing import Dict, Optional, Tuple
+
+from epiclibcpp.epiclib import Symbol
+from epiclibcpp.epiclib.standard_utility_symbols import Nil_c
+import epiclibcpp.epiclib.geometric_utilities as gu
+
+from epicpydevicelib.epicpy_device_base import EpicPyDevice, _as_Symbol
+
+_Pair = Tuple[float, float]
+
+
+def _as_pair(value, x: str, y: str) -> Optional[_Pair]:
+    if value is None:
+        return None
+    if isinstance(value, (gu.Point, gu.Size)):
+        return float(getattr(value, x)), float(getattr(value, y))
+    return float(value[0]), float(value[1])
+
+
+class _SceneObject:
+    __slots__ = ("location", "size", "properties")
+
+    def __init__(
+        self,
+        location: Optional[_Pair],
+        size: Optional[_Pair],
+        properties: Dict[Symbol, Symbol],
+    ):
+        self.location = location
+        self.size = size
+        self.properties = properties
+
+
+class VisualScene:
+    """
+    render() - apply a new frame, sending only the differences to the device
+    clear() - make every object in the scene disappear
+    reset() - forget the current scene without telling the device anything
+    """
+
+    def __init__(self, device: EpicPyDevice):
+        self.device = device
+        self.objects: Dict[Symbol, _SceneObject] = dict()
+
+    def _normalize(self, frame: dict) -> Dict[Symbol, _SceneObject]:
+        symbol = _as_Symbol
+        return {
+            symbol(name): _SceneObject(
+                _as_pair(spec.get("location"), "x", "y"),
+                _as_pair(spec.get("size"), "h", "v"),
+                {
+                    symbol(prop): symbol(value)
+                    for prop, value in spec.get("properties", {}).items()
+                },
+            )
+            for name, spec in frame.items()
+        }
+
+    def render(self, frame: dict) -> int:
+        """Apply frame, returns the number of calls made on the device."""
+        device = self.device
+        new_objects = self._normalize(frame)
+        calls = 0
+
+        for name in [name for name in self.objects if name not in new_objects]:
+            device.make_visual_object_disappear(name)
+            calls += 1
+
+        for name, new in new_objects.items():
+            old = self.objects.get(name)
+
+            if old is None:
+                if new.location is None and new.size is None:
+                    device.make_visual_object_appear(name)
+                else:
+                    device.make_visual_object_appear(
+                        name,
+                        gu.Point(*(new.location or (0.0, 0.0))),
+                        gu.Size(*(new.size or (0.0, 0.0))),
+                    )
+                calls += 1
+                old_properties = {}
+            else:
+                if new.location is not None and new.location != old.location:
+                    device.set_visual_object_location(name, gu.Point(*new.location))
+                    calls += 1
+                elif new.location is None:
+                    new.location = old.location
+                if new.size is not None and new.size != old.size:
+                    device.set_visual_object_size(name, gu.Size(*new.size))
+                    calls += 1
+                elif new.size is None:
+                    new.size = old.size
+                old_properties = old.properties
+
+            for prop, value in new.properties.items():
+                old_value = old_properties.get(prop)
+                # (comparing a Symbol with None crashes epiclib, so test for None first)
+                if old_value is None or old_value != value:
+                    device.set_visual_object_property(name, prop, value)
+                    calls += 1
+            for prop in old_properties:
+                if prop not in new.properties:
+                    device.set_visual_object_property(name, prop, Nil_c)
+                    calls += 1
+
+        self.objects = new_objects
+        return calls
+
+    def clear(self) -> int:
+        return self.render({})
+
+    def reset(self):
+        self.objects = dict()
@@ -0,0 +1,164 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from epicpydevicelib.data_sinks import (
+    ArrowDataSink,
+    CSVDataSink,
+    DataSchemaError,
+    ParquetDataSink,
+    ThreadedDataSink,
+)
+
+
+def read_table(sink_class, path):
+    if sink_class is ParquetDataSink:
+        return pq.read_table(path)
+    with pa.ipc.open_file(path) as reader:
+        return reader.read_all()
+
+
+@pytest.fixture(params=[ArrowDataSink, ParquetDataSink])
+def sink_class(request):
+    return request.param
+
+
+def test_int_column_promoted_to_double(sink_class, tmp_path):
+    path = tmp_path / "data"
+    sink = sink_class(path, mode="w", header=("Trial", "RT"))
+    sink.writerow((1, 500))
+    sink.writerow((2, 510))
+    sink.flush()
+    sink.writerow((3, 512.5))
+    sink.close()
+
+    table = read_table(sink_class, path)
+    assert table.schema.field("RT").type == pa.float64()
+    assert table.column("RT").to_pylist() == [500.0, 510.0, 512.5]
+    assert table.column("Trial").to_pylist() == [1, 2, 3]
+
+
+def test_all_none_column_takes_first_non_null_type(sink_class, tmp_path):
+    path = tmp_path / "data"
+    sink = sink_class(path, mode="w", header=("Trial", "Error"))
+    sink.writerow((1, None))
+    sink.flush()
+    sink.writerow((2, 7))
+    sink.close()
+
+    table = read_table(sink_class, path)
+    assert table.schema.field("Error").type == pa.int64()
+    assert table.column("Error").to_pylist() == [None, 7]
+
+
+def test_incompatible_values_raise_schema_error(sink_class, tmp_path):
+    path = tmp_path / "data"
+    sink = sink_class(path, mode="w", header=("Trial", "RT"))
+    sink.writerow((1, 500))
+    sink.flush()
+    sink.writerow((2, "slow"))
+    with pytest.raises(DataSchemaError):
+        sink.flush()
+    assert isinstance(DataSchemaError(), IOError)
+    assert sink.dropped_rows == 1
+    sink.writerow((3, 520))
+    sink.close()
+
+    assert read_table(sink_class, path).column("RT").to_pylist() == [500, 520]
+
+
+def test_declared_int_column_refuses_truncation(sink_class, tmp_path):
+    sink = sink_class(
+        tmp_path / "data", mode="w", header=("RT",), column_types={"RT": int}
+    )
+    sink.writerow((512.5,))
+    with pytest.raises(DataSchemaError):
+        sink.flush()
+    sink.close()
+
+
+def test_threaded_sink_reports_first_error_and_counts_the_rest(tmp_path):
+    class Failing_sink(CSVDataSink):
+        def writerow(self, row):
+            raise IOError("disk full")
+
+    reported = []
+    sink = ThreadedDataSink(
+        Failing_sink(tmp_path / "data.csv", mode="w", header=("Trial",)),
+        on_error=reported.append,
+    )
+    for trial in range(5):
+        sink.writerow((trial,))
+    sink.flush()
+    assert [str(e) for e in reported] == ["disk full"]
+    sink.close()
+    assert sink.metrics()["errors"] == 5
+    assert len(reported) == 2
+    assert "4 more errors" in str(reported[1])
+
+
+def test_threaded_sink_times_flushes(tmp_path):
+    sink = ThreadedDataSink(
+        CSVDataSink(tmp_path / "data.csv", mode="w", header=("Trial",), max_rows=2)
+    )
+    for trial in range(5):
+        sink.writerow((trial,))
+    sink.flush()
+    assert sink.metrics()["flush_count"] == 3
+    sink.close()
+    assert (tmp_path / "data.csv").read_text().splitlines() == [
+        "Trial",
+        "0",
+        "1",
+        "2",
+        "3",
+        "4",
+    ]
+
+
+def test_append_copies_existing_rows(sink_class, tmp_path):
+    path = tmp_path / "data"
+    for first_trial in (1, 3):
+        sink = sink_class(path, mode="a", header=("Trial", "RT"))
+        sink.writerow((first_trial, 500))
+        sink.writerow((first_trial + 1, 510.5))
+        sink.close()
+
+    assert sink_class.count_rows(path) == 4
+    table = read_table(sink_class, path)
+    assert table.column("Trial").to_pylist() == [1, 2, 3, 4]
+    assert table.column("RT").to_pylist() == [500.0, 510.5, 500.0, 510.5]
+
+
+def test_append_rejects_mismatched_header(sink_class, tmp_path):
+    path = tmp_path / "data"
+    sink = sink_class(path, mode="a", header=("Trial", "RT"))
+    sink.writerow((1, 500))
+    sink.close()
+
+    with pytest.raises(DataSchemaError):
+        sink_class(path, mode="a", header=("Trial", "Accuracy"))
+    assert read_table(sink_class, path).column_names == ["Trial", "RT"]
+    assert list(tmp_path.iterdir()) == [path]
+
+
+def test_append_to_corrupt_file_raises_value_error(sink_class, tmp_path):
+    path = tmp_path / "data"
+    path.write_bytes(b"not a columnar file")
+
+    with pytest.raises(ValueError):
+        sink_class(path, mode="a", header=("Trial", "RT"))
+
+
+def test_merge_files_promotes_types_across_files(sink_class, tmp_path):
+    paths = [tmp_path / f"task_{i}" for i in range(3)]
+    for path, rt in zip(paths, (500, 510.5, 520)):
+        sink = sink_class(path, mode="w", header=("Trial", "RT"))
+        sink.writerow((1, rt))
+        sink.close()
+
+    output = tmp_path / "merged"
+    sink_class.merge_files(iter(paths), output)
+    table = read_table(sink_class, output)
+    assert table.schema.field("RT").type == pa.float64()
+    assert table.column("RT").to_pylist() == [500.0, 510.5, 520.0]
@@ -0,0 +1,148 @@
+import json
+import threading
+import time
+
+from epicpydevicelib.device_emitter import InstrumentedEventEmitter
+
+
+class Recorder:
+    """Listener recording what it got, and how many calls overlapped"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.values = []
+        self.threads = set()
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, value):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.values.append(value)
+            self.threads.add(threading.current_thread().name)
+            self.active -= 1
+
+
+def test_inline_delivery_in_order():
+    bus = InstrumentedEventEmitter()
+    recorder = Recorder()
+    bus.on("progress", recorder)
+    for value in range(5):
+        bus.emit("progress", value)
+    assert recorder.values == [0, 1, 2, 3, 4]
+    assert bus.metrics()["progress"]["emits"] == 5
+
+
+def test_dispatcher_keeps_order_across_events():
+    bus = InstrumentedEventEmitter()
+    received = []
+    bus.on("a", lambda value: received.append(("a", value)))
+    bus.on("b", lambda value: received.append(("b", value)))
+    bus.start_dispatcher(max_queue=4)
+    expected = []
+    for value in range(50):
+        event = "ab"[value % 3 == 0]
+        bus.emit(event, value)
+        expected.append((event, value))
+    assert bus.stop_dispatcher()
+    assert received == expected
+    assert not bus.dispatching
+
+
+def test_stop_dispatcher_with_emits_in_flight():
+    bus = InstrumentedEventEmitter()
+    bus.warn = lambda message: None
+    recorder = Recorder(delay=0.01)
+    bus.on("x", recorder)
+    bus.start_dispatcher()
+    for value in range(5):
+        bus.emit("x", value)
+
+    # times out: the dispatcher is still busy, and keeps the bus until it is done
+    assert not bus.stop_dispatcher(timeout=0.001)
+    assert bus.dispatching
+
+    def emit_more():
+        for value in range(5, 10):
+            bus.emit("x", value)
+
+    emitter = threading.Thread(target=emit_more)
+    emitter.start()
+    emitter.join()
+    deadline = time.monotonic() + 5.0
+    while bus.dispatching and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert not bus.dispatching
+    assert recorder.values == list(range(10))
+    assert recorder.max_active == 1
+    assert recorder.threads == {"event_bus_dispatcher"}
+
+    # back to inline delivery
+    bus.emit("x", 10)
+    assert recorder.values[-1] == 10
+    assert bus.metrics()["x"]["emits"] == 11
+    assert bus.metrics()["x"]["queued"] == 10
+
+
+def test_coalesce_and_drop_policies():
+    bus = InstrumentedEventEmitter()
+    gate = threading.Event()
+    received = []
+    bus.on("block", lambda value: gate.wait(5.0))
+    bus.on("state", received.append)
+    bus.on("noise", received.append)
+    bus.set_event_policy("state", "coalesce")
+    bus.set_event_policy("noise", "drop")
+    bus.start_dispatcher(max_queue=3)
+
+    bus.emit("block", None)  # holds up the dispatcher
+    time.sleep(0.05)
+    for value in range(10):
+        bus.emit("state", value)
+    assert bus.emit("noise", "kept")
+    assert bus.emit("noise", "kept too")
+    assert not bus.emit("noise", "dropped")
+    gate.set()
+    assert bus.stop_dispatcher(timeout=5.0)
+
+    assert received == [9, "kept", "kept too"]
+    metrics = bus.metrics()
+    assert metrics["state"]["coalesced"] == 9
+    assert metrics["noise"]["dropped"] == 1
+
+
+def test_listener_metrics_and_slow_warnings(tmp_path):
+    bus = InstrumentedEventEmitter(slow_listener_seconds=0.01)
+    warnings = []
+    bus.warn = warnings.append
+
+    def fast_listener(value):
+        pass
+
+    bus.on("stats_write", fast_listener)
+    bus.on("stats_write", Recorder(delay=0.02))
+    for value in range(10):
+        bus.emit("stats_write", value)
+    bus.emit("nobody_listens")
+
+    metrics = bus.metrics()
+    stats_write = metrics["stats_write"]
+    assert stats_write["emits"] == 10
+    assert stats_write["listener_calls"] == 20
+    assert stats_write["slow_calls"] == 10
+    assert sum(stats_write["histogram_us"].values()) == 20
+    listeners = stats_write["listeners"]
+    assert listeners[f"{__name__}.{fast_listener.__qualname__}"]["calls"] == 10
+    assert metrics["nobody_listens"]["unhandled"] == 1
+    # on the 1st and 10th slow call only
+    assert len(warnings) == 2 and "10 slow calls" in warnings[1]
+
+    text = bus.dump_metrics(tmp_path / "bus.json")
+    assert json.loads(text) == json.loads((tmp_path / "bus.json").read_text())
+    bus.reset_metrics()
+    assert bus.metrics() == {}
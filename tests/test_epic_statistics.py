@@ -0,0 +1,159 @@
+import json
+
+import numpy as np
+import pytest
+
+from epicpydevicelib import epic_statistics as stats
+
+GETTERS = {
+    "mean": ["get_n", "get_mean", "get_sample_var", "get_est_var", "get_sdm"],
+    "correl": ["get_n", "get_r", "get_slope", "get_intercept"],
+    "pred_obs": ["get_n", "get_rsq", "get_slope", "get_intercept", "get_rmse"],
+}
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(11)
+
+
+def values_of(accumulator, kind):
+    return [getattr(accumulator, getter)() for getter in GETTERS[kind]]
+
+
+def test_bulk_accumulators_match_epic(rng):
+    xs = rng.normal(500, 50, 1000)
+    ys = 0.5 * xs + rng.normal(0, 10, 1000)
+    cases = [
+        ("mean", stats.Mean_accumulator, stats.Bulk_mean_accumulator, (xs,)),
+        ("correl", stats.Correl_accumulator, stats.Bulk_correl_accumulator, (xs, ys)),
+    ]
+    for kind, epic_class, bulk_class, columns in cases:
+        epic, bulk = epic_class(), bulk_class()
+        for row in zip(*columns):
+            epic.update(*map(float, row))
+        bulk.update(*map(float, next(zip(*columns))))
+        if kind == "mean":
+            bulk.update_many(columns[0][1:])
+        else:
+            bulk.update_pairs(*(column[1:] for column in columns))
+        assert values_of(bulk, kind) == values_of(epic, kind), kind
+
+    # (epiclib has no PredObs_accumulator to compare with)
+    one_at_a_time, bulk = (
+        stats.Bulk_PredObs_accumulator(),
+        stats.Bulk_PredObs_accumulator(),
+    )
+    for x, y in zip(xs, ys):
+        one_at_a_time.update(float(x), float(y))
+    bulk.update_pairs(xs, ys)
+    assert values_of(bulk, "pred_obs") == values_of(one_at_a_time, "pred_obs")
+
+
+def test_bulk_distribution_and_proportion_match_epic(rng):
+    xs = rng.normal(5, 4, 1000)
+    epic = stats.Distribution_accumulator(10, 1.0)
+    bulk = stats.Bulk_distribution_accumulator(10, 1.0)
+    for x in xs:
+        epic.update(float(x))
+    bulk.update_many(xs)
+    assert bulk.get_distribution() == list(epic.get_distribution())
+    assert (bulk.get_n(), bulk.get_min(), bulk.get_max()) == (
+        epic.get_n(),
+        epic.get_min(),
+        epic.get_max(),
+    )
+
+    flags = xs > 5
+    epic = stats.Proportion_accumulator()
+    bulk = stats.Bulk_proportion_accumulator()
+    for flag in flags:
+        epic.update(bool(flag))
+    bulk.update_many(flags)
+    assert bulk.get_proportion() == epic.get_proportion()
+
+
+def test_welford_merge_matches_single_pass(rng):
+    xs = rng.normal(1e9, 1.0, 3000)  # large mean, small spread
+    ys = 2.0 * xs + rng.normal(0, 0.5, 3000)
+    chunks = np.array_split(np.arange(3000), 4)
+    cases = [
+        ("mean", stats.Welford_mean_accumulator, lambda a, i: a.update_many(xs[i])),
+        (
+            "correl",
+            stats.Welford_correl_accumulator,
+            lambda a, i: a.update_pairs(xs[i], ys[i]),
+        ),
+        (
+            "pred_obs",
+            stats.Welford_PredObs_accumulator,
+            lambda a, i: a.update_pairs(xs[i], ys[i]),
+        ),
+    ]
+    for kind, accumulator_class, add in cases:
+        whole = accumulator_class()
+        add(whole, np.arange(3000))
+        parts = []
+        for chunk in chunks:
+            part = accumulator_class()
+            add(part, chunk)
+            # as sent back from a worker process
+            parts.append(
+                accumulator_class.from_state(json.loads(json.dumps(part.get_state())))
+            )
+        merged = stats.merge_accumulators(parts)
+        assert values_of(merged, kind) == pytest.approx(values_of(whole, kind)), kind
+        assert parts[0].get_n() == len(chunks[0])  # merging leaves its inputs alone
+
+    mean = stats.Welford_mean_accumulator()
+    for x in xs:
+        mean.update(float(x))
+    assert mean.get_est_var() == pytest.approx(np.var(xs, ddof=1))
+    with pytest.raises(ValueError):
+        stats.merge_accumulators([])
+
+
+def test_quantile_sketch_accuracy_and_merge(rng):
+    rts = rng.lognormal(6.0, 0.4, 200_000)
+    qs = [0.01, 0.1, 0.5, 0.9, 0.99, 0.999]
+    exact = np.quantile(rts, qs)
+
+    sketch = stats.Quantile_sketch(buffer_size=5000)
+    sketch.update_many(rts[:100_000])
+    for rt in rts[100_000:101_000]:
+        sketch.update(float(rt))
+    rest = stats.Quantile_sketch()
+    rest.update_many(rts[101_000:])
+    sketch.merge(stats.Quantile_sketch.from_state(rest.get_state()))
+
+    assert sketch.get_n() == len(rts)
+    assert (sketch.get_min(), sketch.get_max()) == (rts.min(), rts.max())
+    assert sketch.get_n_centroids() < 500
+    np.testing.assert_allclose(sketch.get_quantile(qs), exact, rtol=0.01)
+    assert sketch.get_median() == pytest.approx(np.median(rts), rel=0.005)
+    assert (
+        sketch.get_quantile(0.0) == rts.min() and sketch.get_quantile(1.0) == rts.max()
+    )
+    assert np.isnan(stats.Quantile_sketch().get_median())
+
+
+def test_adaptive_histogram_coarsens_and_merges(rng):
+    xs = rng.normal(0, 100, 50_000)
+    histogram = stats.Adaptive_histogram(bin_size=1.0, max_bins=100)
+    histogram.update_many(xs[:25_000])
+    other = stats.Adaptive_histogram(bin_size=1.0, max_bins=100)
+    for x in xs[25_000:26_000]:
+        other.update(float(x))
+    other.update_many(xs[26_000:])
+    histogram.merge(other)
+
+    assert histogram.get_n() == len(xs) == histogram.get_bin_counts().sum()
+    assert histogram.get_n_bins() <= 100
+    edges = histogram.get_bin_edges()
+    expected, _ = np.histogram(xs, bins=edges)
+    np.testing.assert_array_equal(histogram.get_bin_counts(), expected)
+    assert histogram.get_median() == pytest.approx(
+        np.median(xs), abs=histogram.get_bin_size()
+    )
+    with pytest.raises(ValueError):
+        histogram.merge(stats.Adaptive_histogram(bin_size=2.0))
@@ -0,0 +1,47 @@
+import pytest
+
+from epiclibcpp.epiclib.output_tee_globals import Device_out
+
+from epicpydevicelib.data_sinks import CSVDataSink, ParquetDataSink
+from epicpydevicelib.epicpy_device_base import EpicPyDevice
+
+
+class Recording_device(EpicPyDevice):
+    def __init__(self, device_folder):
+        super(Recording_device, self).__init__(Device_out, "Test", device_folder)
+        self.errors = []
+
+    def report_data_output_error(self, e: Exception):
+        self.errors.append(e)
+
+
+class Failing_close_sink(CSVDataSink):
+    def close(self):
+        raise OSError("disk full")
+
+
+@pytest.fixture
+def device(tmp_path):
+    return Recording_device(tmp_path)
+
+
+def test_finalize_reports_close_errors(device):
+    device.data_sink = Failing_close_sink
+    device.init_data_output()
+    device.data_writer.writerow((1, 2))
+
+    device.finalize_data_output()
+    assert [str(e) for e in device.errors] == ["disk full"]
+    assert device.data_writer is None
+
+    device.finalize_data_output()  # nothing open, nothing to report
+    assert len(device.errors) == 1
+
+
+def test_init_data_output_survives_unreadable_columnar_file(device, tmp_path):
+    device.data_sink = ParquetDataSink
+    device.data_filepath = tmp_path / "data_output.parquet"
+    device.data_filepath.write_bytes(b"not a parquet file")
+
+    device.init_data_output()
+    assert device.data_writer is None
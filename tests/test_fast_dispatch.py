@@ -0,0 +1,100 @@
+from __future__ import annotations  # every annotation here is a string
+
+from typing import List, Union
+
+import pytest
+
+from epicpydevicelib.fast_dispatch import fastmethod
+
+
+class Base:
+    pass
+
+
+class Derived(Base):
+    pass
+
+
+class Device:
+    @fastmethod
+    def set_property(self, name: str, prop: str, value: str):
+        """set a property"""
+        return "str", value
+
+    @fastmethod
+    def set_property(self, name: str, prop: str, value: Union[int, float]):
+        return "number", value
+
+    @fastmethod
+    def set_property(self, name: str, prop: str, value: Base):
+        return "base", value
+
+    @fastmethod
+    def set_property(self, name: str, prop: str, value: object):
+        return "object", value
+
+    @fastmethod
+    def vocal(self, word: str):
+        return "word", word
+
+    @fastmethod
+    def vocal(self, word: str, duration: int, unit: str = "ms", **options):
+        return "timed", word, duration, unit, options
+
+    @fastmethod
+    def points(self, points: List[Base], a: int, b: int, c: int, d: int):
+        return "points", len(points), a + b + c + d
+
+
+def test_overload_resolution():
+    device = Device()
+    assert device.set_property("a", "b", "c") == ("str", "c")
+    assert device.set_property("a", "b", 1) == ("number", 1)
+    assert device.set_property("a", "b", 1.5) == ("number", 1.5)
+    assert device.set_property("a", "b", None) == ("object", None)
+    assert device.vocal("hi") == ("word", "hi")
+    assert device.vocal("hi", 5) == ("timed", "hi", 5, "ms", {})
+    assert device.vocal("hi", 5, "s") == ("timed", "hi", 5, "s", {})
+    assert device.points([Derived()], 1, 2, 3, 4) == ("points", 1, 10)
+    assert Device.set_property.__doc__ == "set a property"
+    with pytest.raises(TypeError):
+        device.vocal(1.5)
+
+
+def test_subclasses_resolved_once_and_cached():
+    device = Device()
+    cache = Device.set_property.dispatcher.cache
+    assert (str, str, Derived) not in cache
+    assert device.set_property("a", "b", Derived())[0] == "base"
+    assert cache[(str, str, Derived)] is cache[(str, str, Base)]
+    # bool is an int
+    assert device.set_property("a", "b", True) == ("number", True)
+    assert (str, str, bool) in cache
+
+
+def test_keyword_arguments_fall_back_to_dispatch():
+    device = Device()
+    assert device.vocal("hi", 5, unit="s") == ("timed", "hi", 5, "s", {})
+    assert device.vocal("hi", 5, loud=True) == ("timed", "hi", 5, "ms", {"loud": True})
+
+
+def test_fast_path_calls_the_overload_registered_last_for_its_signature():
+    class Redefined:
+        @fastmethod
+        def f(self, a: int):
+            return "first"
+
+        @fastmethod
+        def f(self, a: int):
+            return "second"
+
+    assert Redefined.f.dispatcher.fast_signature() == (int,)
+    assert Redefined().f(1) == "second"
+
+
+def test_unresolvable_string_annotation_raises():
+    with pytest.raises(NameError):
+
+        class Broken:
+            @fastmethod
+            def f(self, a: Undefined): ...  # noqa: F821
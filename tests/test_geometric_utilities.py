@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+import epiclibcpp.epiclib.geometric_utilities as gu
+
+from epicpydevicelib import geometric_utilities as geometry
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(7)
+
+
+def test_point_and_rectangle_arrays_match_epic(rng):
+    points = rng.uniform(-10, 10, (500, 2))
+    centers = rng.uniform(-10, 10, (500, 2))
+    sizes = rng.uniform(0.5, 8, (500, 2))
+    gu_points = [gu.Point(*p) for p in points]
+    gu_centers = [gu.Point(*c) for c in centers]
+    gu_sizes = [gu.Size(*s) for s in sizes]
+
+    np.testing.assert_allclose(
+        geometry.cartesian_distance_array(gu_points, gu_centers),
+        [gu.cartesian_distance(p, c) for p, c in zip(gu_points, gu_centers)],
+    )
+    np.testing.assert_array_equal(
+        geometry.is_point_inside_rectangle_array(points, centers, sizes),
+        [
+            gu.is_point_inside_rectangle(p, c, s)
+            for p, c, s in zip(gu_points, gu_centers, gu_sizes)
+        ],
+    )
+    np.testing.assert_allclose(
+        geometry.closest_distance_array(points, centers, sizes),
+        [
+            gu.closest_distance(p, c, s)
+            for p, c, s in zip(gu_points, gu_centers, gu_sizes)
+        ],
+    )
+    np.testing.assert_allclose(
+        geometry.degrees_subtended_array(sizes[:, 0], sizes[:, 1]),
+        [gu.degrees_subtended(h, v) for h, v in sizes],
+    )
+
+
+def test_segment_and_polygon_arrays_match_epic(rng):
+    p1, p2, p = rng.uniform(-10, 10, (3, 500, 2))
+    np.testing.assert_allclose(
+        geometry.distance_from_segment_array(p1, p2, p),
+        [
+            gu.Line_segment(gu.Point(*a), gu.Point(*b)).distance_from_segment(
+                gu.Point(*c)
+            )
+            for a, b, c in zip(p1, p2, p)
+        ],
+    )
+
+    vertices = [(0, 0), (6, 0), (6, 4), (3, 7), (0, 4)]
+    polygon = gu.Polygon([gu.Point(*v) for v in vertices])
+    points = rng.uniform(-2, 9, (500, 2))
+    np.testing.assert_allclose(
+        geometry.distance_inside_polygon_array(vertices, points),
+        [polygon.distance_inside(gu.Point(*q)) for q in points],
+    )
+
+
+def brute_force_distances(objects, p):
+    return {key: geometry.Spatial_index._distance(rect, *p) for key, rect in objects}
+
+
+def test_spatial_index_matches_brute_force(rng):
+    index = geometry.Spatial_index(cell_size=2.0)
+    rects = {}
+    for key in range(300):
+        center, size = rng.uniform(-40, 40, 2), rng.uniform(0, 5, 2)
+        index.insert(key, center, size)
+        rects[key] = (*center, *size)
+    for key in range(0, 300, 3):
+        center = rng.uniform(-40, 40, 2)
+        index.move(key, gu.Point(*center))
+        rects[key] = (*center, *rects[key][2:])
+    for key in range(1, 300, 7):
+        index.remove(key)
+        del rects[key]
+    assert len(index) == len(rects)
+
+    for p in rng.uniform(-60, 60, (200, 2)):
+        distances = brute_force_distances(rects.items(), p)
+        assert sorted(index.objects_at(p)) == sorted(
+            key for key, d in distances.items() if d == 0.0
+        )
+        nearby = index.within_radius(p, 6.0)
+        assert {key for key, _ in nearby} == {
+            key for key, d in distances.items() if d <= 6.0
+        }
+        assert [d for _, d in nearby] == sorted(d for _, d in nearby)
+        expected = sorted(distances.values())[:5]
+        assert [d for _, d in index.nearest(p, k=5)] == pytest.approx(expected)
+
+
+def test_spatial_index_keeps_size_until_placed():
+    index = geometry.Spatial_index()
+    index.resize("Target", (2, 2))
+    assert "Target" not in index
+    index.move("Target", (10, 10))
+    assert index.objects_at((10.9, 9.1)) == ["Target"]
+    index.clear()
+    assert index.nearest((0, 0)) == []
@@ -0,0 +1,71 @@
+import numpy as np
+
+import epiclibcpp.epiclib.random_utilities as ru
+
+from epicpydevicelib import random_utilities
+
+
+def test_bivariate_normal_cdf_array_matches_epic():
+    rng = np.random.default_rng(1)
+    grid = np.arange(-14, 15) / 4.0
+    z1, z2 = np.concatenate(
+        [
+            rng.uniform(-4.0, 4.0, (2, 2000)),
+            np.stack(np.meshgrid(grid, grid)).reshape(2, -1),
+        ],
+        axis=1,
+    )
+    expected = [ru.get_bivariate_normal_cdf(a, b) for a, b in zip(z1, z2)]
+    assert (random_utilities.get_bivariate_normal_cdf_array(z1, z2) == expected).all()
+
+
+def test_bivariate_normal_cdf_array_broadcasts():
+    cdf = random_utilities.get_bivariate_normal_cdf_array([-3, 1, 2], 3)
+    assert cdf.shape == (3,)
+    assert cdf[0] == random_utilities.get_bivariate_normal_cdf(-3, 3) == 0.001348
+
+
+N = 20000
+
+
+def test_unit_normal_random_variable_matches_array():
+    random_utilities.rng_registry.set_master_seed(3)
+    scalar = np.array(
+        [random_utilities.unit_normal_random_variable("normal") for _ in range(N)]
+    )
+    array = random_utilities.unit_normal_random_array(N, stream="normal")
+    for sample in (scalar, array):
+        assert abs(sample.mean()) < 0.05
+        assert abs(sample.std() - 1.0) < 0.05
+        assert (sample < 0.0).any()
+
+
+def test_biased_coin_flip_matches_array():
+    random_utilities.rng_registry.set_master_seed(4)
+    for p in (0.1, 0.75):
+        scalar = np.mean(
+            [random_utilities.biased_coin_flip(p, "coin") for _ in range(N)]
+        )
+        array = random_utilities.biased_coin_flip_array(p, N, stream="coin").mean()
+        assert abs(scalar - p) < 0.02
+        assert abs(array - p) < 0.02
+
+
+def test_detection_functions_match_array_probabilities():
+    random_utilities.rng_registry.set_master_seed(5)
+    cases = [
+        ("gaussian_detection", (0.5, 0.0, 1.0)),
+        ("lapsed_gaussian_detection", (1.0, 0.0, 1.0, 0.1)),
+        ("based_gaussian_detection", (-0.5, 0.2, 0.0, 1.0)),
+        ("capped_gaussian_detection", (0.5, 0.8, 0.0, 1.0)),
+        ("exponential_detection", (1.0, 0.5)),
+        ("based_exponential_detection", (1.0, 0.3, 0.5)),
+    ]
+    for name, args in cases:
+        function = getattr(random_utilities, f"{name}_function")
+        array = getattr(random_utilities, f"{name}_array")
+        p = array(*args, probability_only=True)
+        scalar = np.mean([function(*args, stream=name) for _ in range(N)])
+        sampled = array(*args, size=N, stream=name).mean()
+        assert abs(scalar - p) < 0.02, name
+        assert abs(sampled - p) < 0.02, name
@@ -0,0 +1,129 @@
+import threading
+
+import matplotlib
+
+matplotlib.use("Agg")
+
+import pytest
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter
+
+from epicpydevicelib.stats_channel import FigureRenderer, StatsChannel
+
+
+class Fake_clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_figure(y=(2, 1, 3)) -> Figure:
+    figure = Figure(figsize=(2, 2))
+    figure.add_subplot().plot([1, 2, 3], list(y))
+    return figure
+
+
+@pytest.fixture
+def clock():
+    return Fake_clock()
+
+
+def test_writes_coalesce_by_count(clock):
+    emitted = []
+    channel = StatsChannel(emitted.append, max_writes=3, max_interval=60, clock=clock)
+    for trial in range(7):
+        channel.write(f"t{trial}")
+    assert emitted == ["t0<br>t1<br>t2", "t3<br>t4<br>t5"]
+
+    channel.close()
+    assert emitted[-1] == "t6"
+    assert channel.metrics() == (7, 3, 0)
+
+
+def test_writes_coalesce_by_interval(clock):
+    emitted = []
+    channel = StatsChannel(emitted.append, max_writes=50, max_interval=1, clock=clock)
+    channel.write("a")
+    clock.now = 0.5
+    channel.write("b")
+    assert emitted == []
+
+    clock.now = 1.5
+    channel.write("c")
+    assert emitted == ["a<br>b<br>c"]
+
+    clock.now = 2.0
+    channel.write("d")
+    assert emitted == ["a<br>b<br>c"]  # held until the next write or flush
+    channel.flush()
+    assert emitted == ["a<br>b<br>c", "d"]
+
+
+def test_listener_can_write_back_without_deadlock(clock):
+    emitted = []
+    threads = set()
+    channel = StatsChannel(None, max_writes=1, clock=clock)
+
+    def listener(html):
+        threads.add(threading.current_thread())
+        emitted.append(html)
+        if html == "first":
+            channel.write("from listener")
+            channel.flush()
+
+    channel.emit = listener
+    writer = threading.Thread(target=channel.write, args=("first",))
+    writer.start()
+    writer.join(timeout=5)
+    assert not writer.is_alive()
+
+    assert emitted == ["first", "from listener"]
+    assert threads == {writer}
+
+
+def test_duplicate_figures_dropped_and_rerenders_cached(clock):
+    emitted = []
+    renderer = FigureRenderer(workers=2)
+    channel = StatsChannel(
+        emitted.append, max_writes=10, clock=clock, renderer=renderer
+    )
+    a, b = make_figure(), make_figure((3, 1, 2))
+    assert channel.write_figure(a)
+    assert not channel.write_figure(a)
+    assert channel.write_figure(b)
+    assert channel.write_figure(a)
+    channel.close()
+
+    assert channel.metrics() == (3, 1, 1)
+    assert renderer.renders == 2 and renderer.cache_hits == 2
+    images = emitted[0].split("<br>")
+    assert len(images) == 3 and images[0] == images[2] != images[1]
+    assert renderer.executor is None  # close() shut the pool down
+
+
+def test_unpicklable_figure_rendered_inline(clock):
+    emitted = []
+    renderer = FigureRenderer(workers=2)
+    channel = StatsChannel(emitted.append, max_writes=1, clock=clock, renderer=renderer)
+    figure = make_figure()
+    scale = 10
+    figure.axes[0].yaxis.set_major_formatter(
+        FuncFormatter(lambda y, _: f"{y * scale:.0f}")
+    )
+
+    assert channel.write_figure(figure)
+    assert emitted and emitted[0].startswith("<img src='data:image/png;base64,")
+    channel.close()
+
+
+def test_image_folder_refers_to_files(clock, tmp_path):
+    emitted = []
+    renderer = FigureRenderer(workers=1, image_folder=tmp_path)
+    channel = StatsChannel(emitted.append, max_writes=1, clock=clock, renderer=renderer)
+    channel.write_figure(make_figure())
+    channel.close()
+
+    (png,) = tmp_path.glob("figure_*.png")
+    assert emitted == [f"<img src='{png.resolve().as_uri()}'>"]
@@ -0,0 +1,29 @@
+from epiclibcpp.epiclib import Symbol as _Symbol
+
+from epicpydevicelib.symbol import SymbolCache, symbol_cache
+
+
+def test_module_cache_is_bounded():
+    assert symbol_cache.maxsize is not None
+
+
+def test_cache_interns_and_evicts_least_recently_used():
+    cache = SymbolCache(maxsize=2)
+    a = cache("a")
+    assert isinstance(a, _Symbol) and a.str() == "a"
+    assert cache("a") is a
+    cache("b")
+    cache("a")  # now "b" is the least recently used
+    cache("c")
+
+    assert len(cache) == 2
+    assert cache("a") is a
+    assert cache.stats()["misses"] == 3
+    cache("b")
+    assert cache.stats()["misses"] == 4
+
+
+def test_numbers_keyed_by_type():
+    cache = SymbolCache()
+    assert cache(1) is not cache(1.0)
+    assert cache(1) is cache(1)
@@ -0,0 +1,82 @@
+from epicpydevicelib.visual_scene import VisualScene
+
+
+class Recording_device:
+    """Stands in for an EpicPyDevice, recording each call as (method, name, ...)"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __getattr__(self, method):
+        def record(name, *args):
+            self.calls.append((method, name.str()) + tuple(map(str, args)))
+
+        return record
+
+    def methods(self):
+        calls, self.calls = self.calls, []
+        return [call[0] for call in calls]
+
+
+def frame(target_x=0, color="Red", fixation=True):
+    frame = {
+        "Target": {
+            "location": (target_x, 0),
+            "size": (1, 1),
+            "properties": {"Color": color, "Shape": "Circle"},
+        }
+    }
+    if fixation:
+        frame["Fixation"] = {"location": (0, 0), "size": (0.5, 0.5)}
+    return frame
+
+
+def test_render_sends_only_changes():
+    device = Recording_device()
+    scene = VisualScene(device)
+
+    assert scene.render(frame()) == 4
+    assert sorted(device.methods()) == [
+        "make_visual_object_appear",
+        "make_visual_object_appear",
+        "set_visual_object_property",
+        "set_visual_object_property",
+    ]
+
+    assert scene.render(frame()) == 0
+    assert device.calls == []
+
+    assert scene.render(frame(target_x=5, color="Green", fixation=False)) == 3
+    assert sorted(device.methods()) == [
+        "make_visual_object_disappear",
+        "set_visual_object_location",
+        "set_visual_object_property",
+    ]
+
+
+def test_missing_properties_and_geometry():
+    device = Recording_device()
+    scene = VisualScene(device)
+    scene.render(frame(fixation=False))
+    device.calls = []
+
+    # no location or size: keep them; no Shape: set it to Nil
+    assert scene.render({"Target": {"properties": {"Color": "Red"}}}) == 1
+    ((method, name, prop, value),) = device.calls
+    assert (method, name, prop) == ("set_visual_object_property", "Target", "Shape")
+    assert value == "Nil"
+    assert scene.objects[next(iter(scene.objects))].location == (0.0, 0.0)
+
+
+def test_clear_and_reset():
+    device = Recording_device()
+    scene = VisualScene(device)
+    scene.render(frame())
+    device.calls = []
+
+    assert scene.clear() == 2
+    assert device.methods() == ["make_visual_object_disappear"] * 2
+    scene.render(frame())
+    scene.reset()
+    device.calls = []
+    assert scene.render(frame(fixation=False)) == 3  # all new again